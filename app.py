@@ -724,7 +724,7 @@ def execute_tool(tool, file_paths, output_base, options):
             
             # Read the JSON result
             if os.path.exists(output_json):
-                with open(output_json, 'r') as f:
+                with open(output_json, 'r', encoding='utf-8') as f:
                     validation_result = json.load(f)
                 
                 # Generate HTML report
@@ -78,14 +78,14 @@ class MultiSchemaComparator:
                 if elem:
                     self.comparison_matrix[field_path][schema['name']] = {
                         'present': True,
-                        'type': elem.get('type', ''),
-                        'min_occurs': elem.get('min_occurs', ''),
-                        'max_occurs': elem.get('max_occurs', ''),
-                        'restrictions': elem.get('restrictions', ''),
-                        'field_class': elem.get('field_class', '⚫ NA (Not in XSD)'),
-                        'rulebook': elem.get('rulebook', ''),
-                        'usage_rules': elem.get('usage_rules', ''),
-                        'enumerations': elem.get('enumerations', [])
+                        'type': elem.type,
+                        'min_occurs': elem.min_occurs,
+                        'max_occurs': elem.max_occurs,
+                        'restrictions': elem.restrictions,
+                        'field_class': elem.field_class,
+                        'rulebook': elem.rulebook,
+                        'usage_rules': elem.usage_rules,
+                        'enumerations': elem.enumerations
                     }
                 else:
                     self.comparison_matrix[field_path][schema['name']] = {
@@ -5,16 +5,85 @@ Compares XSD schemas in XML message order with detailed difference reporting
 Generates BOTH Excel and Word document reports
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 import argparse
+import re
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from dataclasses import dataclass, field, replace
+from operator import attrgetter, itemgetter
+from typing import List
+
+# Shared xlsxwriter backend lives beside this script
+sys.path.insert(0, str(Path(__file__).parent))
+from xlsx_backend import HAS_XLSXWRITER, XlsxWriterBook, XlsxWriterSheet, XlsxWriterStyles
+
+
+# One parser for every schema: no ID table, entity expansion, blank text or comments
+_PARSER = etree.XMLParser(remove_blank_text=True, remove_comments=True, huge_tree=True,
+                          collect_ids=False, resolve_entities=False)
+
+XS_NS = '{http://www.w3.org/2001/XMLSchema}'
+_XS_SIMPLE_TYPE = XS_NS + 'simpleType'
+_XS_COMPLEX_TYPE = XS_NS + 'complexType'
+
+# Schema queries compiled once; each returns a (possibly empty) list
+_XS = {'xs': 'http://www.w3.org/2001/XMLSchema'}
+_FIND_SIMPLE_CONTENT_RESTRICTION = etree.XPath('xs:simpleContent/xs:restriction', namespaces=_XS)
+_FIND_RESTRICTION = etree.XPath('xs:restriction', namespaces=_XS)
+
+# Restriction facets read in one pass over a restriction's children, kept
+# in this order so restriction diffs list them consistently
+_FACETS = ('maxLength', 'minLength', 'length', 'pattern', 'minInclusive',
+           'maxInclusive', 'enumeration', 'fractionDigits', 'totalDigits')
+_XS_FACET_TAGS = {XS_NS + facet: facet for facet in _FACETS if facet != 'enumeration'}
+_XS_ENUMERATION = XS_NS + 'enumeration'
+
+# Schema constructs looked up while expanding elements
+_SCHEMA_TAGS = ('annotation', 'attribute', 'choice', 'complexContent', 'complexType',
+                'documentation', 'element', 'enumeration', 'extension', 'restriction',
+                'sequence', 'simpleType')
+
+
+FIELD_CLASS_NA = '⚫ NA (Not in XSD)'
+
+# Difference severities ordered most-severe first
+SEVERITY_RANK = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+
+# Every ElementRecord field _compare_elements reports on
+_COMPARED_FIELDS = attrgetter('type', 'min_occurs', 'max_occurs', 'restrictions', 'field_class',
+                              'fixed', 'default', 'rulebook', 'usage_rules', 'enumerations')
+
+
+@dataclass(slots=True)
+class ElementRecord:
+    """One element or attribute of a parsed schema, keyed by path in 'elements'"""
+    sequence: int
+    name: str
+    path: str
+    type: str
+    min_occurs: str
+    max_occurs: str
+    default: str
+    fixed: str
+    restrictions: str
+    level: int
+    node_type: str
+    # Element-only details; attributes keep the defaults
+    field_class: str = FIELD_CLASS_NA
+    rulebook: str = ''
+    usage_rules: str = ''
+    enumerations: List[str] = field(default_factory=list)
 
 
 class XSDComparator:
@@ -25,18 +94,18 @@ class XSDComparator:
             elem_name = element
             element = None
         
-        # Check XSD annotation first
-        if element is not None:
+        # Check XSD annotation first; callers that already hold the
+        # annotation node pass it in to skip the lookup
+        if annotation is None and element is not None:
             ns = getattr(self, 'ns', {'xs': 'http://www.w3.org/2001/XMLSchema'})
-            annotation_elem = element.find('xs:annotation', ns)
-            if annotation_elem is not None:
-                docs = annotation_elem.findall('xs:documentation', ns)
-                for doc in docs:
-                    source = doc.get('source', '').strip()
-                    if source == 'Yellow Field':
-                        return '🟡 Yellow (ISO 20022 Spec)'
-                    elif source == 'White Field':
-                        return '⚪ White (ISO 20022 Spec)'
+            annotation = element.find('xs:annotation', ns)
+        if annotation is not None:
+            for doc in annotation.findall(self._tags['documentation']):
+                source = doc.get('source', '').strip()
+                if source == 'Yellow Field':
+                    return '🟡 Yellow (ISO 20022 Spec)'
+                elif source == 'White Field':
+                    return '⚪ White (ISO 20022 Spec)'
         
         # NO INFERENCE - Only use XSD annotations
         # If not in XSD, return NA
@@ -56,21 +125,43 @@ class XSDComparator:
         self.name1 = name1 or Path(schema1_file).stem
         self.name2 = name2 or Path(schema2_file).stem
         
+        # Named types are referenced from many paths; keep what was derived
+        # from each one (keyed by type node, or by type-name pair)
+        self._type_restrictions = {}
+        self._type_enumerations = {}
+        self._restriction_changes = {}
+        
+        # Named complex type -> recorded expansion, replayed under each new
+        # parent path; plus the recordings currently being captured
+        self._expanded_types = {}
+        self._expanding = set()
+        self._recordings = []
+        
         # Parse both schemas
         self.schema1 = self._parse_schema(schema1_file)
         self.schema2 = self._parse_schema(schema2_file)
         
-        # Store differences
+        # Store differences, plus their by-type index and counts for the reports
         self.differences = []
+        self.type_index = defaultdict(list)
+        self.type_counts = Counter()
+        self.severity_counts = Counter()
         
-        # Build type caches for restriction comparison
-        # Get schema roots first
-        self.schema1_root = ET.parse(schema1_file).getroot()
-        self.schema2_root = ET.parse(schema2_file).getroot()
+        # Build type caches for restriction comparison from the trees
+        # already parsed above
         self.ns = self.NAMESPACES
         
-        self.schema1_type_cache = self._build_type_cache(self.schema1_root, self.ns)
-        self.schema2_type_cache = self._build_type_cache(self.schema2_root, self.ns)
+        self.schema1_type_cache = self._build_type_cache(self.schema1['root'], self.ns)
+        self.schema2_type_cache = self._build_type_cache(self.schema2['root'], self.ns)
+        
+        # Everything from here on works from the extracted dicts, so let the
+        # two trees (and every node reference into them) go
+        for schema in (self.schema1, self.schema2):
+            del schema['root']
+            del schema['type_cache']
+        self._type_restrictions.clear()
+        self._type_enumerations.clear()
+        self._expanded_types.clear()
         
 
 
@@ -78,31 +169,31 @@ class XSDComparator:
         """Build cache of all type definitions with their restrictions"""
         type_cache = {}
         
-        # Extract simpleType definitions
-        for simple_type in schema_root.findall('.//xs:simpleType', ns):
-            name = simple_type.get('name')
-            if name:
-                type_cache[name] = self._extract_type_restrictions(simple_type, ns)
-        
-        # Extract complexType base restrictions
-        for complex_type in schema_root.findall('.//xs:complexType', ns):
-            name = complex_type.get('name')
-            if name:
-                # Check for simpleContent with restriction
-                simple_content = complex_type.find('.//xs:simpleContent', ns)
-                if simple_content is not None:
-                    restriction = simple_content.find('.//xs:restriction', ns)
-                    if restriction is not None:
-                        type_cache[name] = self._extract_restrictions_from_element(restriction, ns)
+        # One walk over the tree, stopping only at type definitions
+        for _, type_node in etree.iterwalk(schema_root, events=('start',),
+                                           tag=(_XS_SIMPLE_TYPE, _XS_COMPLEX_TYPE)):
+            name = type_node.get('name')
+            if not name:
+                continue
+            name = sys.intern(name)
+            
+            if type_node.tag == _XS_SIMPLE_TYPE:
+                type_cache[name] = self._extract_type_restrictions(type_node, ns)
+            else:
+                # complexType base restrictions come from simpleContent/restriction
+                restriction = _FIND_SIMPLE_CONTENT_RESTRICTION(type_node)
+                if restriction:
+                    type_cache[name] = self._extract_restrictions_from_element(restriction[0], ns)
         
         return type_cache
     
     def _extract_type_restrictions(self, simple_type, ns):
         """Extract restrictions from a simpleType"""
         restrictions = {}
-        restriction = simple_type.find('xs:restriction', ns)
+        restriction = _FIND_RESTRICTION(simple_type)
         
-        if restriction is not None:
+        if restriction:
+            restriction = restriction[0]
             restrictions = self._extract_restrictions_from_element(restriction, ns)
             restrictions['base'] = restriction.get('base', '').split(':')[-1]
         
@@ -110,57 +201,31 @@ class XSDComparator:
     
     def _extract_restrictions_from_element(self, restriction, ns):
         """Extract all restriction facets"""
-        restrictions = {}
+        found = {}
+        enums = []
         
-        # maxLength
-        max_len = restriction.find('xs:maxLength', ns)
-        if max_len is not None:
-            restrictions['maxLength'] = max_len.get('value')
-        
-        # minLength
-        min_len = restriction.find('xs:minLength', ns)
-        if min_len is not None:
-            restrictions['minLength'] = min_len.get('value')
-        
-        # length (exact)
-        length = restriction.find('xs:length', ns)
-        if length is not None:
-            restrictions['length'] = length.get('value')
-        
-        # pattern
-        pattern = restriction.find('xs:pattern', ns)
-        if pattern is not None:
-            restrictions['pattern'] = pattern.get('value')
-        
-        # minInclusive
-        min_inc = restriction.find('xs:minInclusive', ns)
-        if min_inc is not None:
-            restrictions['minInclusive'] = min_inc.get('value')
-        
-        # maxInclusive
-        max_inc = restriction.find('xs:maxInclusive', ns)
-        if max_inc is not None:
-            restrictions['maxInclusive'] = max_inc.get('value')
-        
-        # enumeration
-        enums = restriction.findall('xs:enumeration', ns)
-        if enums:
-            restrictions['enumeration'] = [e.get('value') for e in enums]
+        for child in restriction:
+            tag = child.tag
+            facet = _XS_FACET_TAGS.get(tag)
+            if facet is not None:
+                # First occurrence wins, as with find()
+                found.setdefault(facet, child.get('value'))
+            elif tag == _XS_ENUMERATION:
+                enums.append(child.get('value'))
         
-        # fractionDigits
-        frac = restriction.find('xs:fractionDigits', ns)
-        if frac is not None:
-            restrictions['fractionDigits'] = frac.get('value')
+        if enums:
+            found['enumeration'] = enums
         
-        # totalDigits
-        total = restriction.find('xs:totalDigits', ns)
-        if total is not None:
-            restrictions['totalDigits'] = total.get('value')
+        restrictions = {facet: found[facet] for facet in _FACETS if facet in found}
         
         return restrictions
     
     def _compare_type_restrictions(self, type1, type2):
         """Compare restrictions between two types"""
+        cached = self._restriction_changes.get((type1, type2))
+        if cached is not None:
+            return cached
+        
         rest1 = self.schema1_type_cache.get(type1, {})
         rest2 = self.schema2_type_cache.get(type2, {})
         
@@ -177,25 +242,41 @@ class XSDComparator:
             if val1 != val2:
                 differences.append(f"{key}: {val1 or 'N/A'} → {val2 or 'N/A'}")
         
+        self._restriction_changes[(type1, type2)] = differences
         return differences
 
     def _parse_schema(self, xsd_file):
         """Parse XSD schema and build element structure"""
-        tree = ET.parse(xsd_file)
+        tree = etree.parse(xsd_file, _PARSER)
         root = tree.getroot()
         ns_prefix = self._detect_namespace(root)
         
-        # Build type cache
-        type_cache = {}
-        for complex_type in root.findall(f'{ns_prefix}complexType', self.NAMESPACES):
-            type_name = complex_type.get('name', '')
-            if type_name:
-                type_cache[type_name] = complex_type
+        # Qualified tag strings for this schema, built once instead of per lookup
+        self._tags = {name: f'{ns_prefix}{name}' for name in _SCHEMA_TAGS}
         
-        for simple_type in root.findall(f'{ns_prefix}simpleType', self.NAMESPACES):
-            type_name = simple_type.get('name', '')
-            if type_name:
-                type_cache[type_name] = simple_type
+        # Build type cache and locate the root element in one pass over the
+        # top-level declarations (simple types win a name clash, as before).
+        # Type names here and on elements are interned, so type_cache lookups
+        # and the restriction caches match keys by identity
+        complex_tag = self._tags['complexType']
+        simple_tag = self._tags['simpleType']
+        element_tag = self._tags['element']
+        type_cache = {}
+        simple_types = {}
+        root_elem = None
+        for child in root:
+            tag = child.tag
+            if tag == complex_tag:
+                type_name = child.get('name', '')
+                if type_name:
+                    type_cache[sys.intern(type_name)] = child
+            elif tag == simple_tag:
+                type_name = child.get('name', '')
+                if type_name:
+                    simple_types[sys.intern(type_name)] = child
+            elif tag == element_tag and root_elem is None:
+                root_elem = child
+        type_cache.update(simple_types)
         
         # Extract metadata
         metadata = {
@@ -206,7 +287,6 @@ class XSDComparator:
         }
         
         # Extract scheme info
-        root_elem = root.find(f'{ns_prefix}element', self.NAMESPACES)
         if root_elem is not None:
             root_type = root_elem.get('type', '')
             metadata['root_element'] = root_elem.get('name', '')
@@ -226,8 +306,8 @@ class XSDComparator:
     
     def _detect_namespace(self, root):
         tag = root.tag
-        if '{http://www.w3.org/2001/XMLSchema}' in tag:
-            return '{http://www.w3.org/2001/XMLSchema}'
+        if XS_NS in tag:
+            return XS_NS
         return ''
     
     def _parse_elements(self, root, ns_prefix, type_cache):
@@ -236,13 +316,13 @@ class XSDComparator:
         sequence = {'count': 0}
         
         # Find root element
-        for elem in root.findall(f'{ns_prefix}element', self.NAMESPACES):
+        for elem in root.findall(self._tags['element']):
             element_name = elem.get('name', '')
-            element_type = elem.get('type', '')
+            element_type = sys.intern(elem.get('type', ''))
             
             self._expand_element(
                 elem, element_name, element_type,
-                path=element_name, level=0,
+                path=sys.intern(element_name), level=0,
                 sequence=sequence, elements_dict=elements_dict,
                 ns_prefix=ns_prefix, type_cache=type_cache
             )
@@ -262,53 +342,57 @@ class XSDComparator:
         # Get restrictions
         restrictions = self._get_restrictions(element_node, element_type, ns_prefix, type_cache)
         
+        # xs:annotation can only be an element's first child, so peek at it
+        # once here rather than find() it in each annotation reader
+        annotation = element_node[0] if len(element_node) else None
+        if annotation is not None and annotation.tag != self._tags['annotation']:
+            annotation = None
+        
         # Get Yellow/White field classification
-        field_class = self._classify_field_from_xsd(element_node)
+        field_class = (self._classify_field_from_xsd(None, annotation=annotation)
+                       if annotation is not None else FIELD_CLASS_NA)
         
         # Get documentation details (Rulebook, Usage Rules)
-        documentation = self._extract_documentation(element_node, ns_prefix)
+        documentation = self._extract_documentation(annotation)
         
         # Get enumeration values if applicable
         enumerations = self._get_enumerations(element_node, element_type, ns_prefix, type_cache)
         
         # Store element info
-        elements_dict[path] = {
-            'sequence': sequence['count'],
-            'name': element_name,
-            'path': path,
-            'type': element_type,
-            'min_occurs': min_occurs,
-            'max_occurs': max_occurs,
-            'default': default,
-            'fixed': fixed,
-            'restrictions': restrictions,
-            'level': level,
-            'node_type': 'element',
-            'field_class': field_class,
-            'rulebook': documentation.get('rulebook', ''),
-            'usage_rules': documentation.get('usage_rules', ''),
-            'enumerations': enumerations
-        }
+        self._store_element(elements_dict, path, ElementRecord(
+            sequence=sequence['count'],
+            name=element_name,
+            path=path,
+            type=element_type,
+            min_occurs=min_occurs,
+            max_occurs=max_occurs,
+            default=default,
+            fixed=fixed,
+            restrictions=restrictions,
+            level=level,
+            node_type='element',
+            field_class=field_class,
+            rulebook=documentation.get('rulebook', ''),
+            usage_rules=documentation.get('usage_rules', ''),
+            enumerations=enumerations
+        ))
         
         # Expand children
-        inline_complex = element_node.find(f'{ns_prefix}complexType', self.NAMESPACES)
+        inline_complex = element_node.find(self._tags['complexType'])
         if inline_complex is not None:
             self._expand_complex_type(inline_complex, path, level + 1, sequence, elements_dict, ns_prefix, type_cache)
         elif element_type:
             type_def = type_cache.get(element_type)
-            if type_def is not None:
-                tag_name = self._get_tag_name(type_def)
-                if tag_name == 'complexType':
-                    self._expand_complex_type(type_def, path, level + 1, sequence, elements_dict, ns_prefix, type_cache)
+            if type_def is not None and type_def.tag == self._tags['complexType']:
+                self._expand_complex_type(type_def, path, level + 1, sequence, elements_dict, ns_prefix, type_cache)
     
-    def _extract_documentation(self, element_node, ns_prefix):
-        """Extract Rulebook and Usage Rules from element annotations"""
+    def _extract_documentation(self, annotation):
+        """Extract Rulebook and Usage Rules from an element's annotation node"""
         result = {'rulebook': '', 'usage_rules': ''}
         
-        annotation = element_node.find(f'{ns_prefix}annotation', self.NAMESPACES)
         if annotation is not None:
             usage_rules = []
-            for doc in annotation.findall(f'{ns_prefix}documentation', self.NAMESPACES):
+            for doc in annotation.findall(self._tags['documentation']):
                 source = doc.get('source', '').strip()
                 text = (doc.text or '').strip()
                 
@@ -328,31 +412,68 @@ class XSDComparator:
         enums = []
         
         # Check inline simpleType
-        simple_type = element_node.find(f'{ns_prefix}simpleType', self.NAMESPACES)
+        simple_type = element_node.find(self._tags['simpleType'])
         if simple_type is not None:
-            restriction = simple_type.find(f'{ns_prefix}restriction', self.NAMESPACES)
+            restriction = simple_type.find(self._tags['restriction'])
             if restriction is not None:
-                for enum in restriction.findall(f'{ns_prefix}enumeration', self.NAMESPACES):
+                for enum in restriction.findall(self._tags['enumeration']):
                     enums.append(enum.get('value', ''))
         
+        if enums:
+            return sorted(enums)
+        
         # Check type reference
-        if not enums and element_type:
+        if element_type:
             type_def = type_cache.get(element_type)
             if type_def is not None:
-                restriction = type_def.find(f'{ns_prefix}restriction', self.NAMESPACES)
-                if restriction is not None:
-                    for enum in restriction.findall(f'{ns_prefix}enumeration', self.NAMESPACES):
-                        enums.append(enum.get('value', ''))
+                type_enums = self._type_enumerations.get(type_def)
+                if type_enums is None:
+                    restriction = type_def.find(self._tags['restriction'])
+                    if restriction is not None:
+                        enums = [enum.get('value', '') for enum in
+                                 restriction.findall(self._tags['enumeration'])]
+                    type_enums = self._type_enumerations[type_def] = tuple(sorted(enums))
+                return list(type_enums)
         
-        return sorted(enums) if enums else []
+        return []
     
     def _expand_complex_type(self, complex_type, parent_path, level, sequence, elements_dict, ns_prefix, type_cache):
-        """Expand complex type"""
+        """Expand complex type, replaying the recorded expansion of named types"""
+        if not complex_type.get('name'):
+            self._expand_type_definition(complex_type, parent_path, level, sequence, elements_dict, ns_prefix, type_cache)
+            return
+        
+        skeleton = self._expanded_types.get(complex_type)
+        if skeleton is not None:
+            for suffix, record, level_delta in skeleton:
+                sequence['count'] += 1
+                path = sys.intern(parent_path + suffix)
+                record = replace(record, sequence=sequence['count'], path=path, level=level + level_delta,
+                                 enumerations=list(record.enumerations))
+                self._store_element(elements_dict, path, record)
+            return
+        
+        # A type that (indirectly) contains itself stops expanding here
+        if complex_type in self._expanding:
+            return
+        
+        skeleton = []
+        self._recordings.append((len(parent_path), level, skeleton))
+        self._expanding.add(complex_type)
+        try:
+            self._expand_type_definition(complex_type, parent_path, level, sequence, elements_dict, ns_prefix, type_cache)
+        finally:
+            self._recordings.pop()
+            self._expanding.discard(complex_type)
+        self._expanded_types[complex_type] = skeleton
+    
+    def _expand_type_definition(self, complex_type, parent_path, level, sequence, elements_dict, ns_prefix, type_cache):
+        """Expand a complex type definition in place"""
         # Handle complexContent
-        complex_content = complex_type.find(f'{ns_prefix}complexContent', self.NAMESPACES)
+        complex_content = complex_type.find(self._tags['complexContent'])
         if complex_content is not None:
-            restriction = complex_content.find(f'{ns_prefix}restriction', self.NAMESPACES)
-            extension = complex_content.find(f'{ns_prefix}extension', self.NAMESPACES)
+            restriction = complex_content.find(self._tags['restriction'])
+            extension = complex_content.find(self._tags['extension'])
             
             target = restriction if restriction is not None else extension
             if target is not None:
@@ -367,11 +488,11 @@ class XSDComparator:
     def _parse_type_content(self, type_node, parent_path, level, sequence, elements_dict, ns_prefix, type_cache):
         """Parse type content"""
         # Handle sequence
-        for seq in type_node.findall(f'{ns_prefix}sequence', self.NAMESPACES):
-            for child_elem in seq.findall(f'{ns_prefix}element', self.NAMESPACES):
+        for seq in type_node.findall(self._tags['sequence']):
+            for child_elem in seq.findall(self._tags['element']):
                 child_name = child_elem.get('name', '')
-                child_type = child_elem.get('type', '')
-                child_path = f"{parent_path}/{child_name}"
+                child_type = sys.intern(child_elem.get('type', ''))
+                child_path = sys.intern(f"{parent_path}/{child_name}")
                 
                 self._expand_element(
                     child_elem, child_name, child_type, child_path, level,
@@ -379,11 +500,11 @@ class XSDComparator:
                 )
         
         # Handle choice
-        for choice in type_node.findall(f'{ns_prefix}choice', self.NAMESPACES):
-            for child_elem in choice.findall(f'{ns_prefix}element', self.NAMESPACES):
+        for choice in type_node.findall(self._tags['choice']):
+            for child_elem in choice.findall(self._tags['element']):
                 child_name = child_elem.get('name', '')
-                child_type = child_elem.get('type', '')
-                child_path = f"{parent_path}/{child_name}"
+                child_type = sys.intern(child_elem.get('type', ''))
+                child_path = sys.intern(f"{parent_path}/{child_name}")
                 
                 self._expand_element(
                     child_elem, child_name, child_type, child_path, level,
@@ -391,43 +512,55 @@ class XSDComparator:
                 )
         
         # Handle attributes
-        for attr in type_node.findall(f'{ns_prefix}attribute', self.NAMESPACES):
+        for attr in type_node.findall(self._tags['attribute']):
             sequence['count'] += 1
             attr_name = attr.get('name', '')
-            attr_type = attr.get('type', '')
+            attr_type = sys.intern(attr.get('type', ''))
             use = attr.get('use', 'optional')
             default = attr.get('default', '')
             fixed = attr.get('fixed', '')
             
-            attr_path = f"{parent_path}/@{attr_name}"
+            attr_path = sys.intern(f"{parent_path}/@{attr_name}")
             restrictions = self._get_restrictions(attr, attr_type, ns_prefix, type_cache)
             
-            elements_dict[attr_path] = {
-                'sequence': sequence['count'],
-                'name': f"@{attr_name}",
-                'path': attr_path,
-                'type': attr_type,
-                'min_occurs': '1' if use == 'required' else '0',
-                'max_occurs': '1',
-                'default': default,
-                'fixed': fixed,
-                'restrictions': restrictions,
-                'level': level,
-                'node_type': 'attribute'
-            }
+            self._store_element(elements_dict, attr_path, ElementRecord(
+                sequence=sequence['count'],
+                name=f"@{attr_name}",
+                path=attr_path,
+                type=attr_type,
+                min_occurs='1' if use == 'required' else '0',
+                max_occurs='1',
+                default=default,
+                fixed=fixed,
+                restrictions=restrictions,
+                level=level,
+                node_type='attribute'
+            ))
+    
+    def _store_element(self, elements_dict, path, record):
+        """Store an element record, adding it to any type expansion being recorded"""
+        # Callers intern paths, so both schemas key their element dicts with the
+        # same string objects and compare() lookups match on identity
+        elements_dict[path] = record
+        for path_offset, base_level, skeleton in self._recordings:
+            skeleton.append((path[path_offset:], record, record.level - base_level))
     
     def _get_restrictions(self, element_node, element_type, ns_prefix, type_cache):
         """Get restrictions for an element"""
         restrictions = []
         
         # Check inline simple type
-        simple_type = element_node.find(f'{ns_prefix}simpleType', self.NAMESPACES)
+        simple_type = element_node.find(self._tags['simpleType'])
         if simple_type is not None:
             restrictions.extend(self._parse_simple_type(simple_type, ns_prefix))
         elif element_type:
             type_def = type_cache.get(element_type)
-            if type_def is not None and self._get_tag_name(type_def) == 'simpleType':
-                restrictions.extend(self._parse_simple_type(type_def, ns_prefix))
+            if type_def is not None and type_def.tag == self._tags['simpleType']:
+                cached = self._type_restrictions.get(type_def)
+                if cached is None:
+                    cached = self._type_restrictions[type_def] = ' | '.join(
+                        self._parse_simple_type(type_def, ns_prefix))
+                return cached
         
         return ' | '.join(restrictions) if restrictions else ''
     
@@ -435,65 +568,72 @@ class XSDComparator:
         """Parse simple type restrictions"""
         restrictions = []
         
-        restriction = simple_type.find(f'{ns_prefix}restriction', self.NAMESPACES)
+        restriction = simple_type.find(self._tags['restriction'])
         if restriction is not None:
+            # One pass over the facets, then report them in a fixed order
+            enums = []
+            facets = {}
+            for child in restriction:
+                tag = child.tag
+                if not tag.startswith(ns_prefix):
+                    continue
+                local_name = tag[len(ns_prefix):]
+                if local_name == 'enumeration':
+                    enums.append(child.get('value', ''))
+                elif local_name in ('pattern', 'minLength', 'maxLength', 'length'):
+                    facets.setdefault(local_name, child.get('value', ''))
+            
             # Enumerations
-            enums = [e.get('value', '') for e in restriction.findall(f'{ns_prefix}enumeration', self.NAMESPACES)]
             if enums:
                 restrictions.append(f"Enum: {', '.join(enums[:5])}{'...' if len(enums) > 5 else ''}")
             
             # Pattern
-            pattern = restriction.find(f'{ns_prefix}pattern', self.NAMESPACES)
-            if pattern is not None:
-                restrictions.append(f"Pattern: {pattern.get('value', '')}")
+            if 'pattern' in facets:
+                restrictions.append(f"Pattern: {facets['pattern']}")
             
             # Length
             for constraint in ['minLength', 'maxLength', 'length']:
-                elem = restriction.find(f'{ns_prefix}{constraint}', self.NAMESPACES)
-                if elem is not None:
-                    restrictions.append(f"{constraint}: {elem.get('value', '')}")
+                if constraint in facets:
+                    restrictions.append(f"{constraint}: {facets[constraint]}")
         
         return restrictions
     
-    def _get_tag_name(self, element):
-        tag = element.tag
-        if '}' in tag:
-            return tag.split('}')[1]
-        return tag
-    
     def compare(self):
         """Compare both schemas"""
         elements1 = self.schema1['elements']
         elements2 = self.schema2['elements']
         
-        # Get all paths
-        all_paths = sorted(set(list(elements1.keys()) + list(elements2.keys())),
-                          key=lambda p: (elements1.get(p, {}).get('sequence', 999999),
-                                        elements2.get(p, {}).get('sequence', 999999)))
+        # Get all paths, bucketed by which schema has them, with their
+        # sequence pair precomputed so the sort runs on plain tuples
+        keys1 = elements1.keys()
+        keys2 = elements2.keys()
+        ordered = [(elements1[p].sequence, elements2[p].sequence, p, elements1[p], elements2[p])
+                   for p in keys1 & keys2]
+        ordered += [(elements1[p].sequence, 999999, p, elements1[p], None) for p in keys1 - keys2]
+        ordered += [(999999, elements2[p].sequence, p, None, elements2[p]) for p in keys2 - keys1]
+        # Paths are unique, so the sort never falls through to the records
+        ordered.sort()
         
         # Compare each path
-        for path in all_paths:
-            elem1 = elements1.get(path)
-            elem2 = elements2.get(path)
-            
+        for _, _, path, elem1, elem2 in ordered:
             if elem1 is None:
                 # Only in schema 2
                 self.differences.append({
                     'type': 'ADDED',
                     'severity': 'HIGH',
                     'path': path,
-                    'element': elem2['name'],
+                    'element': elem2.name,
                     'schema1_value': 'NOT PRESENT',
                     'schema2_value': 'PRESENT',
                     'schema1_type': '',
-                    'schema2_type': elem2['type'],
+                    'schema2_type': elem2.type,
                     'schema1_min': '',
-                    'schema2_min': elem2['min_occurs'],
+                    'schema2_min': elem2.min_occurs,
                     'schema1_max': '',
-                    'schema2_max': elem2['max_occurs'],
+                    'schema2_max': elem2.max_occurs,
                     'impact': f"New field '{path}' added in {self.name2}. May be required in new version.",
                     'sequence1': 0,
-                    'sequence2': elem2['sequence']
+                    'sequence2': elem2.sequence
                 })
             elif elem2 is None:
                 # Only in schema 1
@@ -501,40 +641,57 @@ class XSDComparator:
                     'type': 'REMOVED',
                     'severity': 'HIGH',
                     'path': path,
-                    'element': elem1['name'],
+                    'element': elem1.name,
                     'schema1_value': 'PRESENT',
                     'schema2_value': 'NOT PRESENT',
-                    'schema1_type': elem1['type'],
+                    'schema1_type': elem1.type,
                     'schema2_type': '',
-                    'schema1_min': elem1['min_occurs'],
+                    'schema1_min': elem1.min_occurs,
                     'schema2_min': '',
-                    'schema1_max': elem1['max_occurs'],
+                    'schema1_max': elem1.max_occurs,
                     'schema2_max': '',
                     'impact': f"Field '{path}' removed in {self.name2}. Breaking change if field was in use.",
-                    'sequence1': elem1['sequence'],
+                    'sequence1': elem1.sequence,
                     'sequence2': 0
                 })
             else:
                 # Present in both - check differences
                 self._compare_elements(elem1, elem2, path)
         
+        # Rank each severity once so reports sort on ints rather than strings,
+        # and bucket/count the differences so no report re-filters the list
+        type_index = defaultdict(list)
+        severity_counts = Counter()
+        for diff in self.differences:
+            diff['severity_rank'] = SEVERITY_RANK[diff['severity']]
+            type_index[diff['type']].append(diff)
+            severity_counts[diff['severity']] += 1
+        self.type_index = type_index
+        self.type_counts = Counter({change_type: len(diffs) for change_type, diffs in type_index.items()})
+        self.severity_counts = severity_counts
+        
         return self.differences
     
     def _compare_elements(self, elem1, elem2, path):
         """Compare two elements - only report ORDER_CHANGED if there are other changes"""
         
+        # Most common paths are identical across versions; one tuple compare
+        # skips all the per-field checks below for them
+        if _COMPARED_FIELDS(elem1) == _COMPARED_FIELDS(elem2):
+            return
+        
         # Track if we have any substantive changes (not just order)
         has_substantive_change = False
-        has_order_change = elem1['sequence'] != elem2['sequence']
+        has_order_change = elem1.sequence != elem2.sequence
         
         # Type change
-        if elem1['type'] != elem2['type']:
+        if elem1.type != elem2.type:
             has_substantive_change = True
             # Compare type restrictions
-            restriction_changes = self._compare_type_restrictions(elem1['type'], elem2['type'])
+            restriction_changes = self._compare_type_restrictions(elem1.type, elem2.type)
             restriction_details = '; '.join(restriction_changes) if restriction_changes else ''
             
-            impact_msg = f"Data type changed from '{elem1['type']}' to '{elem2['type']}'. May require data conversion."
+            impact_msg = f"Data type changed from '{elem1.type}' to '{elem2.type}'. May require data conversion."
             if restriction_details:
                 impact_msg += f" Restrictions: {restriction_details}"
             
@@ -542,87 +699,83 @@ class XSDComparator:
                 'type': 'TYPE_CHANGED',
                 'severity': 'HIGH',
                 'path': path,
-                'element': elem1['name'],
-                'schema1_value': elem1['type'],
-                'schema2_value': elem2['type'],
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'element': elem1.name,
+                'schema1_value': elem1.type,
+                'schema2_value': elem2.type,
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': impact_msg,
                 'restriction_details': restriction_details,
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
-        # Cardinality change
-        if elem1['min_occurs'] != elem2['min_occurs']:
+        # Cardinality change - one record covering whichever bounds moved
+        min_changed = elem1.min_occurs != elem2.min_occurs
+        max_changed = elem1.max_occurs != elem2.max_occurs
+        if min_changed or max_changed:
             has_substantive_change = True
-            severity = 'HIGH' if (elem1['min_occurs'] == '0' and elem2['min_occurs'] != '0') else 'MEDIUM'
+            bounds1 = []
+            bounds2 = []
+            impacts = []
+            severity = 'MEDIUM'
+            if min_changed:
+                if elem1.min_occurs == '0' and elem2.min_occurs != '0':
+                    severity = 'HIGH'
+                bounds1.append(f"min:{elem1.min_occurs}")
+                bounds2.append(f"min:{elem2.min_occurs}")
+                impacts.append(f"Field {'is now required' if elem2.min_occurs != '0' else 'is now optional'}.")
+            if max_changed:
+                bounds1.append(f"max:{elem1.max_occurs}")
+                bounds2.append(f"max:{elem2.max_occurs}")
+                impacts.append(f"Max occurrences changed from {elem1.max_occurs} to {elem2.max_occurs}.")
+            
             self.differences.append({
                 'type': 'CARDINALITY_CHANGED',
                 'severity': severity,
                 'path': path,
-                'element': elem1['name'],
-                'schema1_value': f"min:{elem1['min_occurs']}",
-                'schema2_value': f"min:{elem2['min_occurs']}",
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
-                'impact': f"Field {'is now required' if elem2['min_occurs'] != '0' else 'is now optional'}.",
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
-            })
-        
-        if elem1['max_occurs'] != elem2['max_occurs']:
-            has_substantive_change = True
-            self.differences.append({
-                'type': 'CARDINALITY_CHANGED',
-                'severity': 'MEDIUM',
-                'path': path,
-                'element': elem1['name'],
-                'schema1_value': f"max:{elem1['max_occurs']}",
-                'schema2_value': f"max:{elem2['max_occurs']}",
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
-                'impact': f"Max occurrences changed from {elem1['max_occurs']} to {elem2['max_occurs']}.",
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'element': elem1.name,
+                'schema1_value': ' '.join(bounds1),
+                'schema2_value': ' '.join(bounds2),
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
+                'impact': ' '.join(impacts),
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Restrictions change
-        if elem1['restrictions'] != elem2['restrictions']:
+        if elem1.restrictions != elem2.restrictions:
             has_substantive_change = True
             self.differences.append({
                 'type': 'RESTRICTION_CHANGED',
                 'severity': 'HIGH',
                 'path': path,
-                'element': elem1['name'],
-                'schema1_value': elem1['restrictions'] or 'None',
-                'schema2_value': elem2['restrictions'] or 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'element': elem1.name,
+                'schema1_value': elem1.restrictions or 'None',
+                'schema2_value': elem2.restrictions or 'None',
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': "Validation rules changed. May affect data validation.",
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Yellow/White Field Classification change
-        field_class1 = elem1.get('field_class', '⚫ NA (Not in XSD)')
-        field_class2 = elem2.get('field_class', '⚫ NA (Not in XSD)')
+        field_class1 = elem1.field_class
+        field_class2 = elem2.field_class
         
         if field_class1 != field_class2:
             has_substantive_change = True
@@ -653,69 +806,69 @@ class XSDComparator:
                 'type': 'FIELD_CLASS_CHANGED',
                 'severity': severity,
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': field_class1,
                 'schema2_value': field_class2,
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': impact,
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Fixed value change
-        fixed1 = elem1.get('fixed', '')
-        fixed2 = elem2.get('fixed', '')
+        fixed1 = elem1.fixed
+        fixed2 = elem2.fixed
         if fixed1 != fixed2:
             has_substantive_change = True
             self.differences.append({
                 'type': 'FIXED_VALUE_CHANGED',
                 'severity': 'HIGH',
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': fixed1 or 'None',
                 'schema2_value': fixed2 or 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': f"Fixed value changed from '{fixed1 or 'None'}' to '{fixed2 or 'None'}'. Messages must use new fixed value.",
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Default value change
-        default1 = elem1.get('default', '')
-        default2 = elem2.get('default', '')
+        default1 = elem1.default
+        default2 = elem2.default
         if default1 != default2:
             has_substantive_change = True
             self.differences.append({
                 'type': 'DEFAULT_VALUE_CHANGED',
                 'severity': 'MEDIUM',
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': default1 or 'None',
                 'schema2_value': default2 or 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': f"Default value changed from '{default1 or 'None'}' to '{default2 or 'None'}'.",
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Rulebook note change
-        rulebook1 = elem1.get('rulebook', '')
-        rulebook2 = elem2.get('rulebook', '')
+        rulebook1 = elem1.rulebook
+        rulebook2 = elem2.rulebook
         if rulebook1 != rulebook2:
             has_substantive_change = True
             if rulebook1 and rulebook2:
@@ -732,23 +885,23 @@ class XSDComparator:
                 'type': 'RULEBOOK_CHANGED',
                 'severity': severity,
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': (rulebook1[:100] + '...') if len(rulebook1) > 100 else rulebook1 or 'None',
                 'schema2_value': (rulebook2[:100] + '...') if len(rulebook2) > 100 else rulebook2 or 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': impact,
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Usage rules change
-        usage1 = elem1.get('usage_rules', '')
-        usage2 = elem2.get('usage_rules', '')
+        usage1 = elem1.usage_rules
+        usage2 = elem2.usage_rules
         if usage1 != usage2:
             has_substantive_change = True
             if usage1 and usage2:
@@ -765,23 +918,23 @@ class XSDComparator:
                 'type': 'USAGE_RULES_CHANGED',
                 'severity': severity,
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': (usage1[:100] + '...') if len(usage1) > 100 else usage1 or 'None',
                 'schema2_value': (usage2[:100] + '...') if len(usage2) > 100 else usage2 or 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': impact,
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Enumeration change
-        enums1 = elem1.get('enumerations', [])
-        enums2 = elem2.get('enumerations', [])
+        enums1 = elem1.enumerations
+        enums2 = elem2.enumerations
         if enums1 != enums2:
             has_substantive_change = True
             added_enums = set(enums2) - set(enums1)
@@ -801,18 +954,18 @@ class XSDComparator:
                 'type': 'ENUMERATION_CHANGED',
                 'severity': severity,
                 'path': path,
-                'element': elem1['name'],
+                'element': elem1.name,
                 'schema1_value': ', '.join(enums1) if enums1 else 'None',
                 'schema2_value': ', '.join(enums2) if enums2 else 'None',
-                'schema1_type': elem1['type'],
-                'schema2_type': elem2['type'],
-                'schema1_min': elem1['min_occurs'],
-                'schema2_min': elem2['min_occurs'],
-                'schema1_max': elem1['max_occurs'],
-                'schema2_max': elem2['max_occurs'],
+                'schema1_type': elem1.type,
+                'schema2_type': elem2.type,
+                'schema1_min': elem1.min_occurs,
+                'schema2_min': elem2.min_occurs,
+                'schema1_max': elem1.max_occurs,
+                'schema2_max': elem2.max_occurs,
                 'impact': impact,
-                'sequence1': elem1['sequence'],
-                'sequence2': elem2['sequence']
+                'sequence1': elem1.sequence,
+                'sequence2': elem2.sequence
             })
         
         # Only report ORDER_CHANGED if there are other substantive changes
@@ -820,19 +973,85 @@ class XSDComparator:
         # Note: We don't add ORDER_CHANGED to has_substantive_change since it's not substantive itself
 
 
+# Keys every difference record carries, in "All Differences" column order
+_DIFF_DETAIL_FIELDS = itemgetter('severity', 'type', 'path', 'element',
+                                 'schema1_value', 'schema2_value', 'impact')
+
+# Shared report styles - the write-only sheets attach these to every styled
+# cell, so build them once rather than a fresh PatternFill per row. Colours
+# are full ARGB with an opaque alpha; a bare RRGGBB is stored as 00RRGGBB
+HEADER_FILL = PatternFill(start_color='FF366092', end_color='FF366092', fill_type='solid')
+HEADER_FONT = Font(bold=True, color='FFFFFFFF')
+HIGH_FILL = PatternFill(start_color='FFFF0000', end_color='FFFF0000', fill_type='solid')
+HIGH_FONT = Font(color='FFFFFFFF', bold=True)
+MED_FILL = PatternFill(start_color='FFFFA500', end_color='FFFFA500', fill_type='solid')
+LOW_FILL = PatternFill(start_color='FF90EE90', end_color='FF90EE90', fill_type='solid')
+FILL_BY_RANK = (HIGH_FILL, MED_FILL, LOW_FILL)
+FONT_BY_RANK = (HIGH_FONT, None, None)
+# Side-by-Side status colours reuse the severity palette
+FILL_ADDED = LOW_FILL
+FILL_REMOVED = HIGH_FILL
+FILL_CHANGED = MED_FILL
+FONT_WHITE_BOLD = HIGH_FONT
+STATUS_STYLE = {
+    'ADDED': (FILL_ADDED, None),
+    'REMOVED': (FILL_REMOVED, FONT_WHITE_BOLD),
+    'CHANGED': (FILL_CHANGED, None),
+}
+# Lighter whole-row fills for the classification/enumeration sheets
+ROW_FILL_BY_RANK = (
+    PatternFill(start_color='FFFFCDD2', end_color='FFFFCDD2', fill_type='solid'),  # Light red
+    PatternFill(start_color='FFFFF9C4', end_color='FFFFF9C4', fill_type='solid'),  # Light yellow
+    PatternFill(start_color='FFC8E6C9', end_color='FFC8E6C9', fill_type='solid'),  # Light green
+)
+REMOVED_ROW_FILL = PatternFill(start_color='FFFFE6E6', end_color='FFFFE6E6', fill_type='solid')
+CLASSIFICATION_HEADER_FILL = PatternFill(start_color='FF7030A0', end_color='FF7030A0', fill_type='solid')  # Purple
+DOCS_HEADER_FILL = PatternFill(start_color='FF2E7D32', end_color='FF2E7D32', fill_type='solid')  # Green
+ENUM_HEADER_FILL = PatternFill(start_color='FFFF6F00', end_color='FFFF6F00', fill_type='solid')  # Orange
+RULEBOOK_ROW_FILL = PatternFill(start_color='FFE8F5E9', end_color='FFE8F5E9', fill_type='solid')  # Light green
+USAGE_ROW_FILL = PatternFill(start_color='FFFFF3E0', end_color='FFFFF3E0', fill_type='solid')  # Light orange
+TITLE_FONT = Font(size=16, bold=True, color='FFFFFFFF')
+SECTION_FONT = Font(size=12, bold=True)
+LABEL_FONT = Font(bold=True)
+CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+CENTER_WRAP_ALIGN = Alignment(horizontal='center', vertical='center', wrap_text=True)
+WRAP_TOP_ALIGN = Alignment(wrap_text=True, vertical='top')
+
+# Most severe first, then schema order
+_DIFF_SORT_KEY = itemgetter('severity_rank', 'sequence1', 'sequence2')
+
+# Single-key sorts for the per-type sheets; every difference carries these keys
+_BY_SEVERITY = itemgetter('severity_rank')
+_BY_SEQUENCE1 = itemgetter('sequence1')
+_BY_SEQUENCE2 = itemgetter('sequence2')
+_BY_PATH = itemgetter('path')
+
+# Added/Removed Fields columns drawn from the difference and from the element
+_FIELD_SHEET_DIFF_COLS = itemgetter('path', 'element', 'impact')
+_FIELD_SHEET_ELEM_COLS = attrgetter('type', 'min_occurs', 'max_occurs', 'restrictions')
+
+# One "facet: old → new" entry of a TYPE_CHANGED record's restriction_details;
+# an entry only ends at a '; ' that starts the next facet
+_RESTRICTION_DETAIL_RE = re.compile(r'(\w+): (.*?)(?: → (.*?))?(?:; (?=\w+: )|$)')
+
+# Fields whose change marks a Side-by-Side row as CHANGED
+_SIDE_BY_SIDE_FIELDS = attrgetter('type', 'min_occurs', 'max_occurs')
+
+
 class ComparisonReportGenerator:
     """Generate comprehensive comparison Excel report"""
     
     def __init__(self, comparator, output_file):
         self.comparator = comparator
         self.output_file = output_file
-        self.wb = Workbook()
+        # Write-only workbooks stream each row straight to the sheet XML
+        # instead of keeping every Cell alive until save()
+        self.wb = Workbook(write_only=True)
         
     def generate(self):
         """Generate all report sheets"""
-        if 'Sheet' in self.wb.sheetnames:
-            self.wb.remove(self.wb['Sheet'])
-        
+        # Write-only workbooks start without a default sheet; the Summary
+        # sheet is created first so it stays the leading tab
         self._create_summary_sheet()
         self._create_detailed_comparison_sheet()
         self._create_side_by_side_sheet()
@@ -850,118 +1069,69 @@ class ComparisonReportGenerator:
         print(f"   📊 Total differences: {len(self.comparator.differences)}")
         print(f"   📄 Sheets created: 10")
     
+    def _styled_cell(self, ws, value, font=None, fill=None, alignment=None):
+        """Build a write-only cell with its styles attached before it is appended"""
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+    
+    def _severity_cell(self, ws, severity, rank):
+        """Severity cell coloured red/orange/green by its SEVERITY_RANK"""
+        if rank is None:
+            return severity
+        return self._styled_cell(ws, severity, font=FONT_BY_RANK[rank], fill=FILL_BY_RANK[rank])
+    
+    def _append_header(self, ws, headers, fill=HEADER_FILL, alignment=None):
+        """Append the styled header row of a sheet"""
+        ws.append([self._styled_cell(ws, h, font=HEADER_FONT, fill=fill, alignment=alignment)
+                   for h in headers])
+    
     def _create_summary_sheet(self):
         """Create executive summary"""
-        ws = self.wb.create_sheet("Summary", 0)
+        ws = self.wb.create_sheet("Summary")
+        # Sheet-level settings must be in place before the first row is written
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['B'].width = 50
         
         # Title
-        ws['A1'] = "ISO 20022 Payment Schema Comparison - Executive Summary"
-        ws['A1'].font = Font(size=16, bold=True, color='FFFFFF')
-        ws['A1'].fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        ws.merge_cells('A1:D1')
+        ws.append([self._styled_cell(ws, "ISO 20022 Payment Schema Comparison - Executive Summary",
+                                font=TITLE_FONT, fill=HEADER_FILL)])
+        ws.merged_cells.add('A1:D1')
+        ws.append([])
         
         # Metadata
-        row = 3
-        ws[f'A{row}'] = "Report Generated:"
-        ws[f'B{row}'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Schema 1:"
-        ws[f'B{row}'] = f"{self.comparator.name1} ({self.comparator.schema1.get('scheme', 'N/A')})"
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Schema 2:"
-        ws[f'B{row}'] = f"{self.comparator.name2} ({self.comparator.schema2.get('scheme', 'N/A')})"
-        ws[f'A{row}'].font = Font(bold=True)
+        ws.append([self._styled_cell(ws, "Report Generated:", font=LABEL_FONT),
+                   datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+        ws.append([self._styled_cell(ws, "Schema 1:", font=LABEL_FONT),
+                   f"{self.comparator.name1} ({self.comparator.schema1.get('scheme', 'N/A')})"])
+        ws.append([self._styled_cell(ws, "Schema 2:", font=LABEL_FONT),
+                   f"{self.comparator.name2} ({self.comparator.schema2.get('scheme', 'N/A')})"])
+        ws.append([])
         
         # Statistics
-        row += 2
-        ws[f'A{row}'] = "COMPARISON STATISTICS"
-        ws[f'A{row}'].font = Font(size=12, bold=True)
+        ws.append([self._styled_cell(ws, "COMPARISON STATISTICS", font=SECTION_FONT)])
         
-        row += 1
         stats = self._calculate_statistics()
         for metric, count in stats.items():
-            ws[f'A{row}'] = metric
-            ws[f'B{row}'] = count
-            row += 1
+            ws.append([metric, count])
+        ws.append([])
         
         # Severity breakdown
-        row += 1
-        ws[f'A{row}'] = "SEVERITY BREAKDOWN"
-        ws[f'A{row}'].font = Font(size=12, bold=True)
+        ws.append([self._styled_cell(ws, "SEVERITY BREAKDOWN", font=SECTION_FONT)])
         
-        row += 1
         severity_stats = self._calculate_severity_stats()
         for severity, count in severity_stats.items():
-            ws[f'A{row}'] = severity
-            ws[f'B{row}'] = count
-            
-            if severity == 'HIGH':
-                ws[f'A{row}'].fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-                ws[f'A{row}'].font = Font(color='FFFFFF', bold=True)
-            elif severity == 'MEDIUM':
-                ws[f'A{row}'].fill = PatternFill(start_color='FFA500', end_color='FFA500', fill_type='solid')
-            elif severity == 'LOW':
-                ws[f'A{row}'].fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
-            
-            row += 1
-        
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 50
+            ws.append([self._severity_cell(ws, severity, SEVERITY_RANK.get(severity)), count])
     
     def _create_detailed_comparison_sheet(self):
         """Create detailed comparison with all differences"""
         ws = self.wb.create_sheet("All Differences")
         
-        headers = ['Severity', 'Change Type', 'Element Path', 'Element', 
-                   f'{self.comparator.name1}', f'{self.comparator.name2}', 
-                   'Impact', 'Restriction Details', 'Seq1', 'Seq2']
-        ws.append(headers)
-        
-        # Style headers
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Sort by severity and sequence
-        sorted_diffs = sorted(self.comparator.differences, 
-                             key=lambda x: (x.get('severity', 'LOW'), 
-                                          x.get('sequence1', 0), 
-                                          x.get('sequence2', 0)))
-        
-        for diff in sorted_diffs:
-            row = [
-                diff.get('severity', ''),
-                diff.get('type', ''),
-                diff.get('path', ''),
-                diff.get('element', ''),
-                diff.get('schema1_value', ''),
-                diff.get('schema2_value', ''),
-                diff.get('impact', ''),
-                diff.get('restriction_details', ''),
-                diff.get('sequence1', ''),
-                diff.get('sequence2', '')
-            ]
-            ws.append(row)
-            
-            row_num = ws.max_row
-            severity = diff.get('severity', 'LOW')
-            
-            if severity == 'HIGH':
-                ws[f'A{row_num}'].fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-                ws[f'A{row_num}'].font = Font(color='FFFFFF', bold=True)
-            elif severity == 'MEDIUM':
-                ws[f'A{row_num}'].fill = PatternFill(start_color='FFA500', end_color='FFA500', fill_type='solid')
-            elif severity == 'LOW':
-                ws[f'A{row_num}'].fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
-            
-            ws[f'G{row_num}'].alignment = Alignment(wrap_text=True, vertical='top')
-            ws[f'H{row_num}'].alignment = Alignment(wrap_text=True, vertical='top')
-        
         # Column widths
         ws.column_dimensions['A'].width = 10
         ws.column_dimensions['B'].width = 20
@@ -973,154 +1143,138 @@ class ComparisonReportGenerator:
         ws.column_dimensions['H'].width = 40  # Restriction Details
         ws.column_dimensions['I'].width = 8
         ws.column_dimensions['J'].width = 8
-        
         ws.freeze_panes = 'A2'
-        ws.auto_filter.ref = f"A1:J{ws.max_row}"
+        
+        headers = ['Severity', 'Change Type', 'Element Path', 'Element', 
+                   f'{self.comparator.name1}', f'{self.comparator.name2}', 
+                   'Impact', 'Restriction Details', 'Seq1', 'Seq2']
+        self._append_header(ws, headers, alignment=CENTER_ALIGN)
+        
+        # Sort by severity and sequence
+        sorted_diffs = sorted(self.comparator.differences, key=_DIFF_SORT_KEY)
+        
+        for diff in sorted_diffs:
+            # All columns but restriction_details are present on every record,
+            # so pull them in one C-level call instead of ten dict.get()s
+            severity, change_type, path, element, value1, value2, impact = _DIFF_DETAIL_FIELDS(diff)
+            ws.append([self._severity_cell(ws, severity, diff['severity_rank']), change_type, path, element, value1, value2,
+                       self._styled_cell(ws, impact, alignment=WRAP_TOP_ALIGN),
+                       self._styled_cell(ws, diff.get('restriction_details', ''), alignment=WRAP_TOP_ALIGN),
+                       diff['sequence1'], diff['sequence2']])
+        
+        ws.auto_filter.ref = f"A1:J{len(sorted_diffs) + 1}"
     
     def _create_side_by_side_sheet(self):
         """Create side-by-side comparison of all fields"""
         ws = self.wb.create_sheet("Side-by-Side")
         
+        ws.column_dimensions['A'].width = 50
+        ws.column_dimensions['B'].width = 25
+        for col in ['C', 'D', 'E', 'F', 'G', 'H']:
+            ws.column_dimensions[col].width = 20
+        ws.column_dimensions['I'].width = 12
+        ws.freeze_panes = 'A2'
+        
         headers = ['Path', 'Element', 
                    f'{self.comparator.name1} Type', f'{self.comparator.name1} Min', f'{self.comparator.name1} Max',
                    f'{self.comparator.name2} Type', f'{self.comparator.name2} Min', f'{self.comparator.name2} Max',
                    'Status']
-        ws.append(headers)
-        
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        
-        # Get all paths
-        all_paths = sorted(set(list(self.comparator.schema1['elements'].keys()) + 
-                              list(self.comparator.schema2['elements'].keys())),
-                          key=lambda p: (self.comparator.schema1['elements'].get(p, {}).get('sequence', 999999),
-                                        self.comparator.schema2['elements'].get(p, {}).get('sequence', 999999)))
-        
+        self._append_header(ws, headers)
+        
+        # Get all paths, each decorated with its sequence pair once so the
+        # sort compares plain tuples instead of calling a key per comparison
+        elements1 = self.comparator.schema1['elements']
+        elements2 = self.comparator.schema2['elements']
+        decorated = [(elements1[p].sequence if p in elements1 else 999999,
+                      elements2[p].sequence if p in elements2 else 999999, p)
+                     for p in elements1.keys() | elements2.keys()]
+        decorated.sort()
+        all_paths = [p for _, _, p in decorated]
+        
+        # Bind the per-row lookups once
+        e1_get = elements1.get
+        e2_get = elements2.get
+        append = ws.append
         for path in all_paths:
-            elem1 = self.comparator.schema1['elements'].get(path)
-            elem2 = self.comparator.schema2['elements'].get(path)
+            elem1 = e1_get(path)
+            elem2 = e2_get(path)
             
             if elem1 and elem2:
-                status = 'CHANGED' if (elem1['type'] != elem2['type'] or 
-                                      elem1['min_occurs'] != elem2['min_occurs'] or
-                                      elem1['max_occurs'] != elem2['max_occurs']) else 'SAME'
+                status = 'CHANGED' if _SIDE_BY_SIDE_FIELDS(elem1) != _SIDE_BY_SIDE_FIELDS(elem2) else 'SAME'
             elif elem1:
                 status = 'REMOVED'
             else:
                 status = 'ADDED'
             
+            style = STATUS_STYLE.get(status)
+            if style is not None:
+                fill, font = style
+                status_cell = self._styled_cell(ws, status, font=font, fill=fill)
+            else:
+                status_cell = status
+            
             row = [
                 path,
-                elem1['name'] if elem1 else elem2['name'],
-                elem1['type'] if elem1 else '',
-                elem1['min_occurs'] if elem1 else '',
-                elem1['max_occurs'] if elem1 else '',
-                elem2['type'] if elem2 else '',
-                elem2['min_occurs'] if elem2 else '',
-                elem2['max_occurs'] if elem2 else '',
-                status
+                elem1.name if elem1 else elem2.name,
+                elem1.type if elem1 else '',
+                elem1.min_occurs if elem1 else '',
+                elem1.max_occurs if elem1 else '',
+                elem2.type if elem2 else '',
+                elem2.min_occurs if elem2 else '',
+                elem2.max_occurs if elem2 else '',
+                status_cell
             ]
-            ws.append(row)
-            
-            row_num = ws.max_row
-            if status == 'ADDED':
-                ws[f'I{row_num}'].fill = PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid')
-            elif status == 'REMOVED':
-                ws[f'I{row_num}'].fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-                ws[f'I{row_num}'].font = Font(color='FFFFFF', bold=True)
-            elif status == 'CHANGED':
-                ws[f'I{row_num}'].fill = PatternFill(start_color='FFA500', end_color='FFA500', fill_type='solid')
-        
-        ws.column_dimensions['A'].width = 50
-        ws.column_dimensions['B'].width = 25
-        for col in ['C', 'D', 'E', 'F', 'G', 'H']:
-            ws.column_dimensions[col].width = 20
-        ws.column_dimensions['I'].width = 12
+            append(row)
         
-        ws.freeze_panes = 'A2'
-        ws.auto_filter.ref = f"A1:I{ws.max_row}"
+        ws.auto_filter.ref = f"A1:I{len(all_paths) + 1}"
     
     def _create_added_fields_sheet(self):
         """Create sheet with added fields only"""
-        ws = self.wb.create_sheet("Added Fields")
-        
-        headers = ['Path', 'Element', 'Type', 'Min', 'Max', 'Restrictions', 'Impact']
-        ws.append(headers)
-        
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        
-        added = [d for d in self.comparator.differences if d['type'] == 'ADDED']
-        for diff in sorted(added, key=lambda x: x.get('sequence2', 0)):
-            elem = self.comparator.schema2['elements'].get(diff['path'])
-            if elem:
-                row = [
-                    diff['path'],
-                    diff['element'],
-                    elem['type'],
-                    elem['min_occurs'],
-                    elem['max_occurs'],
-                    elem.get('restrictions', ''),
-                    diff['impact']
-                ]
-                ws.append(row)
+        self._populate_field_sheet("Added Fields", self.comparator.type_index['ADDED'],
+                                   _BY_SEQUENCE2, self.comparator.schema2['elements'])
+    
+    def _create_removed_fields_sheet(self):
+        """Create sheet with removed fields only"""
+        self._populate_field_sheet("Removed Fields", self.comparator.type_index['REMOVED'],
+                                   _BY_SEQUENCE1, self.comparator.schema1['elements'],
+                                   path_fill=REMOVED_ROW_FILL)
+    
+    def _populate_field_sheet(self, title, diffs, sort_key, schema_elements, path_fill=None):
+        """Write an added/removed field sheet from the schema that has the fields"""
+        ws = self.wb.create_sheet(title)
         
         for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
             ws.column_dimensions[col].width = 40
-        
         ws.freeze_panes = 'A2'
-    
-    def _create_removed_fields_sheet(self):
-        """Create sheet with removed fields only"""
-        ws = self.wb.create_sheet("Removed Fields")
         
         headers = ['Path', 'Element', 'Type', 'Min', 'Max', 'Restrictions', 'Impact']
-        ws.append(headers)
+        self._append_header(ws, headers)
         
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        
-        removed = [d for d in self.comparator.differences if d['type'] == 'REMOVED']
-        for diff in sorted(removed, key=lambda x: x.get('sequence1', 0)):
-            elem = self.comparator.schema1['elements'].get(diff['path'])
+        elem_get = schema_elements.get
+        append = ws.append
+        for diff in sorted(diffs, key=sort_key):
+            path, element, impact = _FIELD_SHEET_DIFF_COLS(diff)
+            elem = elem_get(path)
             if elem:
-                row = [
-                    diff['path'],
-                    diff['element'],
-                    elem['type'],
-                    elem['min_occurs'],
-                    elem['max_occurs'],
-                    elem.get('restrictions', ''),
-                    diff['impact']
-                ]
-                ws.append(row)
-                
-                row_num = ws.max_row
-                ws[f'A{row_num}'].fill = PatternFill(start_color='FFE6E6', end_color='FFE6E6', fill_type='solid')
-        
-        for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
-            ws.column_dimensions[col].width = 40
-        
-        ws.freeze_panes = 'A2'
+                if path_fill is not None:
+                    path = self._styled_cell(ws, path, fill=path_fill)
+                append((path, element, *_FIELD_SHEET_ELEM_COLS(elem), impact))
     
     def _create_changed_fields_sheet(self):
         """Create sheet with changed fields only"""
         ws = self.wb.create_sheet("Changed Fields")
         
+        for col in ['A', 'B', 'C', 'D', 'E', 'F']:
+            ws.column_dimensions[col].width = 40
+        ws.freeze_panes = 'A2'
+        
         headers = ['Path', 'Element', 'Change Type', 
                    f'{self.comparator.name1}', f'{self.comparator.name2}', 'Impact']
-        ws.append(headers)
-        
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+        self._append_header(ws, headers)
         
         changed = [d for d in self.comparator.differences 
                   if d['type'] not in ['ADDED', 'REMOVED']]
-        for diff in sorted(changed, key=lambda x: x.get('path', '')):
+        for diff in sorted(changed, key=_BY_PATH):
             row = [
                 diff['path'],
                 diff['element'],
@@ -1130,93 +1284,74 @@ class ComparisonReportGenerator:
                 diff['impact']
             ]
             ws.append(row)
-        
-        for col in ['A', 'B', 'C', 'D', 'E', 'F']:
-            ws.column_dimensions[col].width = 40
-        
-        ws.freeze_panes = 'A2'
     
 
     def _create_type_restriction_sheet(self):
         """Create detailed type restriction changes sheet"""
         ws = self.wb.create_sheet("Type Restriction Changes")
         
+        # Column widths
+        ws.column_dimensions['A'].width = 25
+        ws.column_dimensions['B'].width = 50
+        ws.column_dimensions['C'].width = 30
+        ws.column_dimensions['D'].width = 30
+        ws.column_dimensions['E'].width = 20
+        ws.column_dimensions['F'].width = 20
+        ws.column_dimensions['G'].width = 20
+        ws.freeze_panes = 'A2'
+        
         headers = ['Element', 'Path', f'{self.comparator.name1} Type', 
                    f'{self.comparator.name2} Type', 'Restriction', 
                    'Old Value', 'New Value']
-        ws.append(headers)
-        
-        # Style headers
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        self._append_header(ws, headers, alignment=CENTER_ALIGN)
         
         # Filter for type changes only
-        type_changes = [d for d in self.comparator.differences if d.get('type') == 'TYPE_CHANGED']
+        type_changes = self.comparator.type_index['TYPE_CHANGED']
         
+        row_count = 1
         for diff in type_changes:
             restriction_details = diff.get('restriction_details', '')
             if restriction_details:
                 # Parse restriction details
-                restrictions = restriction_details.split('; ')
-                for restr in restrictions:
-                    if ':' in restr:
-                        parts = restr.split(': ')
-                        if len(parts) == 2:
-                            restriction_name = parts[0]
-                            values = parts[1]
-                            if ' → ' in values:
-                                old_val, new_val = values.split(' → ')
-                            else:
-                                old_val = values
-                                new_val = 'N/A'
-                            ws.append([
-                                diff.get('element', ''),
-                                diff.get('path', ''),
-                                diff.get('schema1_type', ''),
-                                diff.get('schema2_type', ''),
-                                restriction_name,
-                                old_val,
-                                new_val
-                            ])
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 50
-        ws.column_dimensions['C'].width = 30
-        ws.column_dimensions['D'].width = 30
-        ws.column_dimensions['E'].width = 20
-        ws.column_dimensions['F'].width = 20
-        ws.column_dimensions['G'].width = 20
-        
-        ws.freeze_panes = 'A2'
-        if ws.max_row > 1:
-            ws.auto_filter.ref = f"A1:G{ws.max_row}"
+                for restriction_name, old_val, new_val in _RESTRICTION_DETAIL_RE.findall(restriction_details):
+                    ws.append([
+                        diff.get('element', ''),
+                        diff.get('path', ''),
+                        diff.get('schema1_type', ''),
+                        diff.get('schema2_type', ''),
+                        restriction_name,
+                        old_val,
+                        new_val or 'N/A'
+                    ])
+                    row_count += 1
+        
+        if row_count > 1:
+            ws.auto_filter.ref = f"A1:G{row_count}"
     
     def _create_field_classification_sheet(self):
         """Create Yellow/White field classification changes sheet"""
         ws = self.wb.create_sheet("Field Classification Changes")
         
+        # Column widths
+        ws.column_dimensions['A'].width = 12
+        ws.column_dimensions['B'].width = 20
+        ws.column_dimensions['C'].width = 55
+        ws.column_dimensions['D'].width = 28
+        ws.column_dimensions['E'].width = 28
+        ws.column_dimensions['F'].width = 18
+        ws.column_dimensions['G'].width = 60
+        ws.freeze_panes = 'A2'
+        
         headers = ['Severity', 'Element', 'Path', 
                    f'{self.comparator.name1} Classification', 
                    f'{self.comparator.name2} Classification',
                    'Change Direction', 'Business Impact']
-        ws.append(headers)
-        
-        # Style headers
-        header_fill = PatternFill(start_color='7030A0', end_color='7030A0', fill_type='solid')  # Purple for classification
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        self._append_header(ws, headers, fill=CLASSIFICATION_HEADER_FILL,
+                            alignment=CENTER_WRAP_ALIGN)
         
         # Filter for field classification changes only
-        field_class_changes = [d for d in self.comparator.differences if d.get('type') == 'FIELD_CLASS_CHANGED']
-        
         # Sort by severity (HIGH first)
-        severity_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-        field_class_changes.sort(key=lambda x: severity_order.get(x.get('severity', 'LOW'), 3))
+        field_class_changes = sorted(self.comparator.type_index['FIELD_CLASS_CHANGED'], key=_BY_SEVERITY)
         
         for diff in field_class_changes:
             class1 = diff.get('schema1_value', '')
@@ -1238,7 +1373,10 @@ class ComparisonReportGenerator:
             else:
                 direction = 'Changed'
             
-            ws.append([
+            # Color code rows by severity
+            fill = ROW_FILL_BY_RANK[diff['severity_rank']]
+            
+            ws.append([self._styled_cell(ws, value, fill=fill) for value in (
                 diff.get('severity', ''),
                 diff.get('element', ''),
                 diff.get('path', ''),
@@ -1246,65 +1384,44 @@ class ComparisonReportGenerator:
                 class2,
                 direction,
                 diff.get('impact', '')
-            ])
-            
-            # Color code rows by severity
-            row_num = ws.max_row
-            severity = diff.get('severity', 'LOW')
-            if severity == 'HIGH':
-                fill_color = 'FFCDD2'  # Light red
-            elif severity == 'MEDIUM':
-                fill_color = 'FFF9C4'  # Light yellow
-            else:
-                fill_color = 'C8E6C9'  # Light green
-            
-            for cell in ws[row_num]:
-                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 12
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 55
-        ws.column_dimensions['D'].width = 28
-        ws.column_dimensions['E'].width = 28
-        ws.column_dimensions['F'].width = 18
-        ws.column_dimensions['G'].width = 60
+            )])
         
-        ws.freeze_panes = 'A2'
-        if ws.max_row > 1:
-            ws.auto_filter.ref = f"A1:G{ws.max_row}"
+        if field_class_changes:
+            ws.auto_filter.ref = f"A1:G{len(field_class_changes) + 1}"
     
     def _create_documentation_changes_sheet(self):
         """Create Rulebook and Usage Rules changes sheet"""
         ws = self.wb.create_sheet("Documentation Changes")
         
+        # Column widths
+        ws.column_dimensions['A'].width = 10
+        ws.column_dimensions['B'].width = 15
+        ws.column_dimensions['C'].width = 20
+        ws.column_dimensions['D'].width = 50
+        ws.column_dimensions['E'].width = 50
+        ws.column_dimensions['F'].width = 50
+        ws.column_dimensions['G'].width = 50
+        ws.freeze_panes = 'A2'
+        
         headers = ['Severity', 'Change Type', 'Element', 'Path', 
                    f'{self.comparator.name1}', 
                    f'{self.comparator.name2}',
                    'Business Impact']
-        ws.append(headers)
-        
-        # Style headers
-        header_fill = PatternFill(start_color='2E7D32', end_color='2E7D32', fill_type='solid')  # Green for docs
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        self._append_header(ws, headers, fill=DOCS_HEADER_FILL,
+                            alignment=CENTER_WRAP_ALIGN)
         
-        # Filter for documentation changes
-        doc_changes = [d for d in self.comparator.differences 
-                       if d.get('type') in ['RULEBOOK_CHANGED', 'USAGE_RULES_CHANGED']]
-        
-        # Sort by type then severity
-        type_order = {'RULEBOOK_CHANGED': 0, 'USAGE_RULES_CHANGED': 1}
-        severity_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-        doc_changes.sort(key=lambda x: (type_order.get(x.get('type'), 9), 
-                                         severity_order.get(x.get('severity', 'LOW'), 3)))
+        # Documentation changes sorted by type then severity; the type
+        # buckets are already separate, so only severity needs sorting
+        doc_changes = (sorted(self.comparator.type_index['RULEBOOK_CHANGED'], key=_BY_SEVERITY) +
+                       sorted(self.comparator.type_index['USAGE_RULES_CHANGED'], key=_BY_SEVERITY))
         
         for diff in doc_changes:
             change_type = 'Rulebook' if diff.get('type') == 'RULEBOOK_CHANGED' else 'Usage Rules'
             
-            ws.append([
+            # Color code by type
+            fill = RULEBOOK_ROW_FILL if change_type == 'Rulebook' else USAGE_ROW_FILL
+            
+            ws.append([self._styled_cell(ws, value, fill=fill, alignment=WRAP_TOP_ALIGN) for value in (
                 diff.get('severity', ''),
                 change_type,
                 diff.get('element', ''),
@@ -1312,52 +1429,35 @@ class ComparisonReportGenerator:
                 diff.get('schema1_value', ''),
                 diff.get('schema2_value', ''),
                 diff.get('impact', '')
-            ])
-            
-            # Color code by type
-            row_num = ws.max_row
-            if change_type == 'Rulebook':
-                fill_color = 'E8F5E9'  # Light green
-            else:
-                fill_color = 'FFF3E0'  # Light orange
-            
-            for cell in ws[row_num]:
-                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-                cell.alignment = Alignment(wrap_text=True, vertical='top')
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 10
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 50
-        ws.column_dimensions['E'].width = 50
-        ws.column_dimensions['F'].width = 50
-        ws.column_dimensions['G'].width = 50
+            )])
         
-        ws.freeze_panes = 'A2'
-        if ws.max_row > 1:
-            ws.auto_filter.ref = f"A1:G{ws.max_row}"
+        if doc_changes:
+            ws.auto_filter.ref = f"A1:G{len(doc_changes) + 1}"
     
     def _create_enumeration_changes_sheet(self):
         """Create enumeration changes sheet"""
         ws = self.wb.create_sheet("Enumeration Changes")
         
+        # Column widths
+        ws.column_dimensions['A'].width = 10
+        ws.column_dimensions['B'].width = 20
+        ws.column_dimensions['C'].width = 45
+        ws.column_dimensions['D'].width = 30
+        ws.column_dimensions['E'].width = 30
+        ws.column_dimensions['F'].width = 25
+        ws.column_dimensions['G'].width = 25
+        ws.column_dimensions['H'].width = 45
+        ws.freeze_panes = 'A2'
+        
         headers = ['Severity', 'Element', 'Path', 
                    f'{self.comparator.name1} Values', 
                    f'{self.comparator.name2} Values',
                    'Added Values', 'Removed Values', 'Impact']
-        ws.append(headers)
-        
-        # Style headers
-        header_fill = PatternFill(start_color='FF6F00', end_color='FF6F00', fill_type='solid')  # Orange
-        for cell in ws[1]:
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        self._append_header(ws, headers, fill=ENUM_HEADER_FILL,
+                            alignment=CENTER_WRAP_ALIGN)
         
         # Filter for enumeration changes
-        enum_changes = [d for d in self.comparator.differences 
-                        if d.get('type') == 'ENUMERATION_CHANGED']
+        enum_changes = self.comparator.type_index['ENUMERATION_CHANGED']
         
         for diff in enum_changes:
             val1 = diff.get('schema1_value', '') or ''
@@ -1369,7 +1469,10 @@ class ComparisonReportGenerator:
             added = enums2 - enums1
             removed = enums1 - enums2
             
-            ws.append([
+            # Color code by severity
+            fill = ROW_FILL_BY_RANK[diff['severity_rank']]
+            
+            ws.append([self._styled_cell(ws, value, fill=fill, alignment=WRAP_TOP_ALIGN) for value in (
                 diff.get('severity', ''),
                 diff.get('element', ''),
                 diff.get('path', ''),
@@ -1378,63 +1481,71 @@ class ComparisonReportGenerator:
                 ', '.join(sorted(added)) if added else 'None',
                 ', '.join(sorted(removed)) if removed else 'None',
                 diff.get('impact', '')
-            ])
-            
-            # Color code by severity
-            row_num = ws.max_row
-            severity = diff.get('severity', 'LOW')
-            if severity == 'HIGH':
-                fill_color = 'FFCDD2'  # Light red
-            elif severity == 'MEDIUM':
-                fill_color = 'FFF9C4'  # Light yellow
-            else:
-                fill_color = 'C8E6C9'  # Light green
-            
-            for cell in ws[row_num]:
-                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-                cell.alignment = Alignment(wrap_text=True, vertical='top')
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 10
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 45
-        ws.column_dimensions['D'].width = 30
-        ws.column_dimensions['E'].width = 30
-        ws.column_dimensions['F'].width = 25
-        ws.column_dimensions['G'].width = 25
-        ws.column_dimensions['H'].width = 45
+            )])
         
-        ws.freeze_panes = 'A2'
-        if ws.max_row > 1:
-            ws.auto_filter.ref = f"A1:H{ws.max_row}"
+        if enum_changes:
+            ws.auto_filter.ref = f"A1:H{len(enum_changes) + 1}"
     
     def _calculate_statistics(self):
         """Calculate statistics"""
+        counts = self.comparator.type_counts
         stats = {
             'Total Differences': len(self.comparator.differences),
-            'Fields Added': len([d for d in self.comparator.differences if d['type'] == 'ADDED']),
-            'Fields Removed': len([d for d in self.comparator.differences if d['type'] == 'REMOVED']),
-            'Type Changes': len([d for d in self.comparator.differences if d['type'] == 'TYPE_CHANGED']),
-            'Cardinality Changes': len([d for d in self.comparator.differences if d['type'] == 'CARDINALITY_CHANGED']),
-            'Restriction Changes': len([d for d in self.comparator.differences if d['type'] == 'RESTRICTION_CHANGED']),
-            'Field Class Changes': len([d for d in self.comparator.differences if d['type'] == 'FIELD_CLASS_CHANGED']),
-            'Enumeration Changes': len([d for d in self.comparator.differences if d['type'] == 'ENUMERATION_CHANGED']),
-            'Rulebook Changes': len([d for d in self.comparator.differences if d['type'] == 'RULEBOOK_CHANGED']),
-            'Usage Rule Changes': len([d for d in self.comparator.differences if d['type'] == 'USAGE_RULES_CHANGED']),
-            'Fixed Value Changes': len([d for d in self.comparator.differences if d['type'] == 'FIXED_VALUE_CHANGED']),
-            'Default Value Changes': len([d for d in self.comparator.differences if d['type'] == 'DEFAULT_VALUE_CHANGED']),
+            'Fields Added': counts['ADDED'],
+            'Fields Removed': counts['REMOVED'],
+            'Type Changes': counts['TYPE_CHANGED'],
+            'Cardinality Changes': counts['CARDINALITY_CHANGED'],
+            'Restriction Changes': counts['RESTRICTION_CHANGED'],
+            'Field Class Changes': counts['FIELD_CLASS_CHANGED'],
+            'Enumeration Changes': counts['ENUMERATION_CHANGED'],
+            'Rulebook Changes': counts['RULEBOOK_CHANGED'],
+            'Usage Rule Changes': counts['USAGE_RULES_CHANGED'],
+            'Fixed Value Changes': counts['FIXED_VALUE_CHANGED'],
+            'Default Value Changes': counts['DEFAULT_VALUE_CHANGED'],
         }
         return stats
     
     def _calculate_severity_stats(self):
         """Calculate severity statistics"""
         stats = {'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-        for diff in self.comparator.differences:
-            severity = diff.get('severity', 'LOW')
-            stats[severity] = stats.get(severity, 0) + 1
+        stats.update(self.comparator.severity_counts)
         return stats
 
 
+class _XlsxWriterFilter:
+    """auto_filter whose ref is applied as an xlsxwriter autofilter"""
+    
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._ref = None
+    
+    @property
+    def ref(self):
+        return self._ref
+    
+    @ref.setter
+    def ref(self, value):
+        self._ref = value
+        self._worksheet.autofilter(value)
+
+
+class _XlsxWriterFilterSheet(XlsxWriterSheet):
+    """xlsxwriter sheet that also supports auto_filter.ref"""
+    
+    def __init__(self, worksheet):
+        super().__init__(worksheet)
+        self.auto_filter = _XlsxWriterFilter(worksheet)
+
+
+class XlsxWriterReportGenerator(XlsxWriterStyles, ComparisonReportGenerator):
+    """Same comparison workbook as ComparisonReportGenerator, written by xlsxwriter"""
+    
+    def __init__(self, comparator, output_file):
+        self.comparator = comparator
+        self.output_file = output_file
+        # constant_memory flushes each row as soon as the next one starts
+        self.wb = XlsxWriterBook(output_file, sheet_class=_XlsxWriterFilterSheet)
+        self._formats = {}
 
 
 class WordDocumentGenerator:
@@ -1459,6 +1570,10 @@ class WordDocumentGenerator:
     
     def generate(self):
         """Generate Word document"""
+        # Resolve the bullet style once; passing the style object saves a
+        # by-name style lookup on every bullet paragraph
+        self._bullet_style = self.doc.styles['List Bullet']
+        
         self._add_title_page()
         self._add_executive_summary()
         self._add_statistics_section()
@@ -1508,7 +1623,7 @@ class WordDocumentGenerator:
         stats = self._calculate_statistics()
         self.doc.add_heading('Key Findings', 2)
         for metric, count in stats.items():
-            self.doc.add_paragraph(f"{metric}: {count}", style='List Bullet')
+            self.doc.add_paragraph(f"{metric}: {count}", style=self._bullet_style)
     
     def _add_statistics_section(self):
         """Add statistics"""
@@ -1532,11 +1647,11 @@ class WordDocumentGenerator:
         self.doc.add_page_break()
         self.doc.add_heading('Removed Fields', 1)
         
-        removed = [d for d in self.comparator.differences if d['type'] == 'REMOVED']
+        removed = self.comparator.type_index['REMOVED']
         if removed:
             self.doc.add_paragraph(f"Found {len(removed)} removed fields:")
             for diff in removed[:20]:
-                self.doc.add_paragraph(diff['path'], style='List Bullet')
+                self.doc.add_paragraph(diff['path'], style=self._bullet_style)
             if len(removed) > 20:
                 self.doc.add_paragraph(f"... and {len(removed)-20} more (see Excel report)")
         else:
@@ -1547,12 +1662,12 @@ class WordDocumentGenerator:
         self.doc.add_page_break()
         self.doc.add_heading('Changed Fields', 1)
         
-        type_changes = [d for d in self.comparator.differences if d['type'] == 'TYPE_CHANGED']
+        type_changes = self.comparator.type_index['TYPE_CHANGED']
         if type_changes:
             self.doc.add_heading('Type Changes', 2)
             self.doc.add_paragraph(f"Found {len(type_changes)} type changes:")
             for diff in type_changes:  # Show ALL
-                p = self.doc.add_paragraph(style='List Bullet')
+                p = self.doc.add_paragraph(style=self._bullet_style)
                 p.add_run(f"{diff['path']}: ").bold = True
                 p.add_run(f"{diff['schema1_type']} → {diff['schema2_type']}")
             if len(type_changes) > 15:
@@ -1563,35 +1678,47 @@ class WordDocumentGenerator:
         self.doc.add_page_break()
         self.doc.add_heading('Recommendations', 1)
         
-        removed_count = len([d for d in self.comparator.differences if d['type'] == 'REMOVED'])
+        removed_count = self.comparator.type_counts['REMOVED']
         
         if removed_count > 0:
             self.doc.add_heading('Address Removed Fields', 2)
             self.doc.add_paragraph(f"{removed_count} fields were removed. Actions:")
-            self.doc.add_paragraph("• Review usage of removed fields", style='List Bullet')
-            self.doc.add_paragraph("• Update message templates", style='List Bullet')
-            self.doc.add_paragraph("• Modify validation logic", style='List Bullet')
+            self.doc.add_paragraph("• Review usage of removed fields", style=self._bullet_style)
+            self.doc.add_paragraph("• Update message templates", style=self._bullet_style)
+            self.doc.add_paragraph("• Modify validation logic", style=self._bullet_style)
         
         self.doc.add_heading('Testing', 2)
-        self.doc.add_paragraph("• Test with new schema", style='List Bullet')
-        self.doc.add_paragraph("• Validate all 232323232232 cases", style='List Bullet')
-        self.doc.add_paragraph("• Check backward compatibility", style='List Bullet')
+        self.doc.add_paragraph("• Test with new schema", style=self._bullet_style)
+        self.doc.add_paragraph("• Validate all 232323232232 cases", style=self._bullet_style)
+        self.doc.add_paragraph("• Check backward compatibility", style=self._bullet_style)
     
     def _calculate_statistics(self):
         """Calculate statistics"""
+        counts = self.comparator.type_counts
         return {
             'Total Differences': len(self.comparator.differences),
-            'Fields Added': len([d for d in self.comparator.differences if d['type'] == 'ADDED']),
-            'Fields Removed': len([d for d in self.comparator.differences if d['type'] == 'REMOVED']),
-            'Type Changes': len([d for d in self.comparator.differences if d['type'] == 'TYPE_CHANGED']),
-            'Cardinality Changes': len([d for d in self.comparator.differences if d['type'] == 'CARDINALITY_CHANGED']),
-            'Field Class Changes': len([d for d in self.comparator.differences if d['type'] == 'FIELD_CLASS_CHANGED']),
-            'Enumeration Changes': len([d for d in self.comparator.differences if d['type'] == 'ENUMERATION_CHANGED']),
-            'Rulebook Changes': len([d for d in self.comparator.differences if d['type'] == 'RULEBOOK_CHANGED']),
-            'Usage Rule Changes': len([d for d in self.comparator.differences if d['type'] == 'USAGE_RULES_CHANGED']),
+            'Fields Added': counts['ADDED'],
+            'Fields Removed': counts['REMOVED'],
+            'Type Changes': counts['TYPE_CHANGED'],
+            'Cardinality Changes': counts['CARDINALITY_CHANGED'],
+            'Field Class Changes': counts['FIELD_CLASS_CHANGED'],
+            'Enumeration Changes': counts['ENUMERATION_CHANGED'],
+            'Rulebook Changes': counts['RULEBOOK_CHANGED'],
+            'Usage Rule Changes': counts['USAGE_RULES_CHANGED'],
         }
 
 
+def _generate_html_report(comparator, html_file):
+    """Generate the optional interactive HTML report"""
+    try:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from html_report_generator import InteractiveHTMLGenerator
+        html_gen = InteractiveHTMLGenerator(comparator, html_file)
+        html_gen.generate()
+    except Exception as e:
+        print(f"   ⚠️  HTML generation: {str(e)[:50]}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Compare XSD schemas - Generates Excel + Word reports'
@@ -1602,6 +1729,8 @@ def main():
                        default='xsd_comparison_report.xlsx')
     parser.add_argument('-n1', '--name1', help='Name for first schema')
     parser.add_argument('-n2', '--name2', help='Name for second schema')
+    parser.add_argument('--writer', choices=['openpyxl', 'xlsxwriter'], default='openpyxl',
+                       help='Excel writer backend (xlsxwriter streams with constant memory)')
     
     args = parser.parse_args()
     
@@ -1620,25 +1749,24 @@ def main():
     
     print(f"\n⏳ Generating reports...")
     
-    # Generate Excel
-    excel_report = ComparisonReportGenerator(comparator, args.output)
-    excel_report.generate()
-    
-    # Generate Word
-    word_file = args.output.replace('.xlsx', '.docx')
-    word_report = WordDocumentGenerator(comparator, word_file)
-    word_report.generate()
+    if args.writer == 'xlsxwriter' and not HAS_XLSXWRITER:
+        print("   ⚠️  xlsxwriter not installed - falling back to openpyxl")
+        args.writer = 'openpyxl'
+    report_class = XlsxWriterReportGenerator if args.writer == 'xlsxwriter' else ComparisonReportGenerator
+    output_path = Path(args.output)
+    word_file = output_path.with_suffix('.docx')
+    html_file = output_path.with_suffix('.html')
     
-    # Generate HTML
-    html_file = args.output.replace('.xlsx', '.html')
-    try:
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent))
-        from html_report_generator import InteractiveHTMLGenerator
-        html_gen = InteractiveHTMLGenerator(comparator, html_file)
-        html_gen.generate()
-    except Exception as e:
-        print(f"   ⚠️  HTML generation: {str(e)[:50]}")
+    # Excel, Word and HTML only read the finished comparison and each writes its
+    # own file, so generate them side by side
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(report_class(comparator, args.output).generate),
+            executor.submit(WordDocumentGenerator(comparator, word_file).generate),
+            executor.submit(_generate_html_report, comparator, html_file),
+        ]
+        for future in futures:
+            future.result()
     
     print(f"\n{'='*70}")
     print("✅ COMPLETE!")
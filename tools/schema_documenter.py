@@ -4,56 +4,92 @@ XSD to Excel Converter - FULLY ENHANCED VERSION
 Includes: Choice indicators, Sample values, Validation rules, Business mapping, ISO metadata
 """
 
-import xml.etree.ElementTree as ET
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import argparse
+import os
+import tempfile
 from pathlib import Path
 import re
+import sys
 from datetime import datetime
 import random
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import List
 
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+    
+    # Schemas only: no ID table, entity expansion, blank text or comments
+    _PARSER = ET.XMLParser(remove_blank_text=True, remove_comments=True, huge_tree=True,
+                           collect_ids=False, resolve_entities=False)
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+    _PARSER = None
 
-class SampleValueGenerator:
-    def _classify_field(self, element, elem_name='', min_occurs='1', annotation=None):
-        """Read Yellow/White from XSD annotations - ISO 20022 Spec"""
-        # Try to get element if passed as string
-        if isinstance(element, str):
-            elem_name = element
-            element = None
-        
-        # Check XSD annotation first
-        if element is not None:
-            ns = getattr(self, 'ns', {'xs': 'http://www.w3.org/2001/XMLSchema'})
-            annotation_elem = element.find('xs:annotation', ns)
-            if annotation_elem is not None:
-                docs = annotation_elem.findall('xs:documentation', ns)
-                for doc in docs:
-                    source = doc.get('source', '').strip()
-                    if source == 'Yellow Field':
-                        return '🟡 Yellow (ISO 20022 Spec)'
-                    elif source == 'White Field':
-                        return '⚪ White (ISO 20022 Spec)'
-        
-        # NO INFERENCE - Only use XSD annotations
-        # If not in XSD, return NA
-        
-        return '⚫ NA (Not in XSD)'
+# Shared xlsxwriter backend lives beside this script
+sys.path.insert(0, str(Path(__file__).parent))
+from xlsx_backend import HAS_XLSXWRITER, XlsxWriterBook, XlsxWriterStyles
+
+# Schema constructs looked up while expanding elements and restrictions
+_SCHEMA_TAGS = ('all', 'annotation', 'attribute', 'choice', 'complexContent', 'complexType',
+                'documentation', 'element', 'enumeration', 'extension', 'fractionDigits',
+                'length', 'maxInclusive', 'maxLength', 'minInclusive', 'minLength', 'pattern',
+                'restriction', 'sequence', 'simpleType')
+
+# First repeat count in a digit pattern, e.g. the 4 in "[0-9]{4}"
+_DIGIT_COUNT_RE = re.compile(r'\{(\d+)')
+
+# Field classes read from the XSD annotations; nodes hold these exact strings
+FIELD_CLASS_YELLOW = '🟡 Yellow (ISO 20022 Spec)'
+FIELD_CLASS_WHITE = '⚪ White (ISO 20022 Spec)'
+FIELD_CLASS_NA = '⚫ NA (Not in XSD)'
+
+# Deepest level of elements listed on the Quick Reference sheet
+QUICK_REF_MAX_LEVEL = 5
 
+# Date and time samples, fixed for the whole run
+_NOW = datetime.now()
+_SAMPLE_DATETIME = _NOW.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+_SAMPLE_DATE = _NOW.strftime("%Y-%m-%d")
+
+
+@dataclass(slots=True)
+class SchemaNode:
+    """One element or attribute of the expanded message structure"""
+    sequence: int
+    level: int
+    full_path: str
+    name: str
+    type: str
+    min_occurs: str
+    max_occurs: str
+    default: str
+    fixed: str
+    annotation: str
+    node_type: str
+    business_entity: str
+    field_class: str = FIELD_CLASS_NA
+    restrictions: str = ''
+    validation_rules: List[str] = field(default_factory=list)
+    choice_info: str = ''
+    sample_value: str = ''
+    children: List['SchemaNode'] = field(default_factory=list)
+    # Display strings filled in by flatten_tree for the exporter
+    indented_name: str = ''
+    validation_text: str = ''
+
+
+class SampleValueGenerator:
     """Generate sample values based on XSD types and restrictions"""
     
     @staticmethod
-    def generate(element_name, elem_type, restrictions, path):
-        """Generate a sample value for an element"""
-        
-        # Parse restrictions
-        restrictions_dict = {}
-        if restrictions:
-            for restriction in restrictions.split('|'):
-                restriction = restriction.strip()
-                if ':' in restriction:
-                    key, value = restriction.split(':', 1)
-                    restrictions_dict[key.strip()] = value.strip()
+    def generate(element_name, elem_type, restrictions_dict, path):
+        """Generate a sample value for an element from its parsed restrictions"""
         
         # Check for pattern
         if 'Pattern' in restrictions_dict:
@@ -80,10 +116,10 @@ class SampleValueGenerator:
             return "EUR"
         
         if 'datetime' in type_lower or 'DateTime' in elem_type:
-            return datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            return _SAMPLE_DATETIME
         
         if 'date' in type_lower and 'time' not in type_lower:
-            return datetime.now().strftime("%Y-%m-%d")
+            return _SAMPLE_DATE
         
         if 'time' in type_lower and 'date' not in type_lower:
             return "10:30:00"
@@ -141,7 +177,7 @@ class SampleValueGenerator:
             # Count digits
             if "{" in pattern:
                 try:
-                    count = int(re.search(r'\{(\d+)', pattern).group(1))
+                    count = int(_DIGIT_COUNT_RE.search(pattern).group(1))
                     return "1" * count
                 except:
                     return "123"
@@ -182,16 +218,20 @@ class BusinessEntityMapper:
         'Strd': 'Structured (Formatted data)',
     }
     
+    # Path search order: the first key found anywhere in the path wins
+    _ENTITY_ITEMS = tuple(ENTITY_MAP.items())
+    
     @staticmethod
     def get_entity(element_name, path):
         """Get business entity for an element"""
         
         # Direct match
-        if element_name in BusinessEntityMapper.ENTITY_MAP:
-            return BusinessEntityMapper.ENTITY_MAP[element_name]
+        entity = BusinessEntityMapper.ENTITY_MAP.get(element_name)
+        if entity:
+            return entity
         
         # Check path components
-        for key, value in BusinessEntityMapper.ENTITY_MAP.items():
+        for key, value in BusinessEntityMapper._ENTITY_ITEMS:
             if key in path:
                 return value
         
@@ -225,11 +265,22 @@ class XSDParser:
     def __init__(self, xsd_file, schema_name=None):
         self.xsd_file = xsd_file
         self.schema_name = schema_name or Path(xsd_file).stem
-        self.tree = ET.parse(xsd_file)
+        self.tree = ET.parse(xsd_file, _PARSER)
         self.root = self.tree.getroot()
         self.ns_prefix = self._detect_namespace()
+        # Qualified tag strings for this schema, built once instead of per lookup
+        self._tags = {name: f'{self.ns_prefix}{name}' for name in _SCHEMA_TAGS}
+        self._documentation_path = f"{self._tags['annotation']}/{self._tags['documentation']}"
         self.type_cache = {}
+        self._type_refs = {}  # Type reference as written -> definition (or None)
+        self.root_elements = []
         self.choice_groups = {}  # Track choice groups
+        self._expand_cache = {}  # Named complex type -> (children, parent path length, level)
+        # Per-node results; parsed nodes are never modified
+        self._annotation_cache = {}
+        self._field_class_cache = {}
+        self._restriction_cache = {}
+        self.quick_ref_elements = []  # Filled by flatten_tree
         self._build_type_cache()
         self._extract_metadata()
         
@@ -263,8 +314,8 @@ class XSDParser:
                     self.metadata['version'] = msg_parts[3]
         
         # Get root element name (usually message name)
-        root_elem = self.root.find(f'{self.ns_prefix}element', self.NAMESPACES)
-        if root_elem is not None:
+        if self.root_elements:
+            root_elem = self.root_elements[0]
             root_type = root_elem.get('type', '')
             self.metadata['root_element'] = root_elem.get('name', '')
             self.metadata['root_type'] = root_type
@@ -277,19 +328,23 @@ class XSDParser:
     def _classify_field_from_xsd(self, element):
         """Read Yellow/White ONLY from XSD annotations - NO INFERENCE"""
         if element is None:
-            return '⚫ NA (Not in XSD)'
-            
-        annotation = element.find(f'{self.ns_prefix}annotation', self.NAMESPACES)
-        if annotation is not None:
-            docs = annotation.findall(f'{self.ns_prefix}documentation', self.NAMESPACES)
-            for doc in docs:
+            return FIELD_CLASS_NA
+        
+        field_class = self._field_class_cache.get(element)
+        if field_class is None:
+            field_class = FIELD_CLASS_NA
+            # One path walk over the documentation nodes, stopping at the first marker
+            for doc in element.iterfind(self._documentation_path):
                 source = doc.get('source', '').strip()
                 if source == 'Yellow Field':
-                    return '🟡 Yellow (ISO 20022 Spec)'
+                    field_class = FIELD_CLASS_YELLOW
+                    break
                 elif source == 'White Field':
-                    return '⚪ White (ISO 20022 Spec)'
+                    field_class = FIELD_CLASS_WHITE
+                    break
+            self._field_class_cache[element] = field_class
         
-        return '⚫ NA (Not in XSD)'
+        return field_class
     
     def _get_tag_name(self, element):
         tag = element.tag
@@ -297,15 +352,16 @@ class XSDParser:
             return tag.split('}')[1]
         return tag
     
-    def _get_attribute(self, element, attr_name):
-        return element.get(attr_name, '')
-    
     def _get_annotation(self, element):
         """Extract annotation/documentation"""
+        cached = self._annotation_cache.get(element)
+        if cached is not None:
+            return cached
+        
         annotation_parts = []
-        annotation = element.find(f'{self.ns_prefix}annotation', self.NAMESPACES)
+        annotation = element.find(self._tags['annotation'])
         if annotation is not None:
-            for doc in annotation.findall(f'{self.ns_prefix}documentation', self.NAMESPACES):
+            for doc in annotation.findall(self._tags['documentation']):
                 if doc.text and doc.text.strip():
                     text = doc.text.strip()
                     source = doc.get('source', '')
@@ -315,73 +371,95 @@ class XSDParser:
                     else:
                         annotation_parts.append(text)
         
-        return ' | '.join(annotation_parts) if annotation_parts else ''
+        result = ' | '.join(annotation_parts) if annotation_parts else ''
+        self._annotation_cache[element] = result
+        return result
     
     def _build_type_cache(self):
-        """Build cache of all named types"""
-        for complex_type in self.root.findall(f'{self.ns_prefix}complexType', self.NAMESPACES):
-            type_name = self._get_attribute(complex_type, 'name')
-            if type_name:
-                self.type_cache[type_name] = complex_type
-        
-        for simple_type in self.root.findall(f'{self.ns_prefix}simpleType', self.NAMESPACES):
-            type_name = self._get_attribute(simple_type, 'name')
-            if type_name:
-                self.type_cache[type_name] = simple_type
+        """Build cache of all named types and collect the top-level elements"""
+        # One pass over the top-level declarations (simple types win a name
+        # clash, as when they were cached after the complex types)
+        complex_tag = self._tags['complexType']
+        simple_tag = self._tags['simpleType']
+        element_tag = self._tags['element']
+        simple_types = {}
+        for child in self.root:
+            tag = child.tag
+            if tag == complex_tag:
+                type_name = child.get('name', '')
+                if type_name:
+                    self.type_cache[type_name] = child
+            elif tag == simple_tag:
+                type_name = child.get('name', '')
+                if type_name:
+                    simple_types[type_name] = child
+            elif tag == element_tag:
+                self.root_elements.append(child)
+        self.type_cache.update(simple_types)
     
     def _get_type_definition(self, type_name):
         """Get the definition of a named type"""
-        if ':' in type_name:
-            type_name = type_name.split(':')[1]
-        return self.type_cache.get(type_name)
+        # Each distinct reference (prefixed or not) is resolved once
+        try:
+            return self._type_refs[type_name]
+        except KeyError:
+            local_name = type_name.split(':')[1] if ':' in type_name else type_name
+            type_def = self._type_refs[type_name] = self.type_cache.get(local_name)
+            return type_def
     
     def _parse_simple_type_restrictions(self, simple_type):
         """Parse restrictions from simple type"""
-        restriction_info = {'base_type': '', 'restrictions': '', 'validation_rules': []}
-        restrictions = []
+        cached = self._restriction_cache.get(simple_type)
+        if cached is not None:
+            return cached
+        
+        restriction_info = {'base_type': '', 'restrictions': '', 'restrictions_dict': {},
+                            'validation_rules': []}
+        restrictions = restriction_info['restrictions_dict']
+        tags = self._tags
         
-        restriction = simple_type.find(f'{self.ns_prefix}restriction', self.NAMESPACES)
+        restriction = simple_type.find(tags['restriction'])
         if restriction is not None:
-            base = self._get_attribute(restriction, 'base')
-            restriction_info['base_type'] = base or 'string'
+            base = restriction.get('base', '')
+            restriction_info['base_type'] = sys.intern(base) if base else 'string'
             
             # Enumerations
             enums = []
-            for enum in restriction.findall(f'{self.ns_prefix}enumeration', self.NAMESPACES):
-                value = self._get_attribute(enum, 'value')
+            for enum in restriction.findall(tags['enumeration']):
+                value = enum.get('value', '')
                 if value:
                     enums.append(value)
             if enums:
-                restrictions.append(f"Enum: {', '.join(enums[:10])}{'...' if len(enums) > 10 else ''}")
+                restrictions['Enum'] = f"{', '.join(enums[:10])}{'...' if len(enums) > 10 else ''}"
                 restriction_info['validation_rules'].append(f"✓ Must be one of: {', '.join(enums[:5])}{'...' if len(enums) > 5 else ''}")
             
             # Pattern
-            pattern = restriction.find(f'{self.ns_prefix}pattern', self.NAMESPACES)
+            pattern = restriction.find(tags['pattern'])
             if pattern is not None:
-                pattern_value = self._get_attribute(pattern, 'value')
+                pattern_value = pattern.get('value', '')
                 if pattern_value:
-                    restrictions.append(f"Pattern: {pattern_value}")
+                    restrictions['Pattern'] = pattern_value
                     restriction_info['validation_rules'].append(f"✓ Must match pattern: {pattern_value}")
             
             # Length constraints
-            min_length = restriction.find(f'{self.ns_prefix}minLength', self.NAMESPACES)
-            max_length = restriction.find(f'{self.ns_prefix}maxLength', self.NAMESPACES)
-            length = restriction.find(f'{self.ns_prefix}length', self.NAMESPACES)
+            min_length = restriction.find(tags['minLength'])
+            max_length = restriction.find(tags['maxLength'])
+            length = restriction.find(tags['length'])
             
             if length is not None:
-                len_val = self._get_attribute(length, 'value')
-                restrictions.append(f"Length: {len_val}")
+                len_val = length.get('value', '')
+                restrictions['Length'] = len_val
                 restriction_info['validation_rules'].append(f"✓ Must be exactly {len_val} characters")
             else:
                 if min_length is not None:
-                    min_val = self._get_attribute(min_length, 'value')
-                    restrictions.append(f"MinLength: {min_val}")
+                    min_val = min_length.get('value', '')
+                    restrictions['MinLength'] = min_val
                 if max_length is not None:
-                    max_val = self._get_attribute(max_length, 'value')
-                    restrictions.append(f"MaxLength: {max_val}")
+                    max_val = max_length.get('value', '')
+                    restrictions['MaxLength'] = max_val
                 if min_length is not None or max_length is not None:
-                    min_v = self._get_attribute(min_length, 'value') if min_length is not None else ''
-                    max_v = self._get_attribute(max_length, 'value') if max_length is not None else ''
+                    min_v = min_length.get('value', '') if min_length is not None else ''
+                    max_v = max_length.get('value', '') if max_length is not None else ''
                     if min_v and max_v:
                         restriction_info['validation_rules'].append(f"✓ Length must be {min_v}-{max_v} characters")
                     elif max_v:
@@ -390,17 +468,17 @@ class XSDParser:
                         restriction_info['validation_rules'].append(f"✓ Minimum {min_v} characters")
             
             # Numeric constraints
-            min_inc = restriction.find(f'{self.ns_prefix}minInclusive', self.NAMESPACES)
-            max_inc = restriction.find(f'{self.ns_prefix}maxInclusive', self.NAMESPACES)
+            min_inc = restriction.find(tags['minInclusive'])
+            max_inc = restriction.find(tags['maxInclusive'])
             
             if min_inc is not None or max_inc is not None:
-                min_v = self._get_attribute(min_inc, 'value') if min_inc is not None else None
-                max_v = self._get_attribute(max_inc, 'value') if max_inc is not None else None
+                min_v = min_inc.get('value', '') if min_inc is not None else None
+                max_v = max_inc.get('value', '') if max_inc is not None else None
                 
                 if min_v:
-                    restrictions.append(f"Min: {min_v}")
+                    restrictions['Min'] = min_v
                 if max_v:
-                    restrictions.append(f"Max: {max_v}")
+                    restrictions['Max'] = max_v
                 
                 if min_v and max_v:
                     restriction_info['validation_rules'].append(f"✓ Value must be between {min_v} and {max_v}")
@@ -410,13 +488,14 @@ class XSDParser:
                     restriction_info['validation_rules'].append(f"✓ Maximum value: {max_v}")
             
             # Fraction digits
-            frac_digits = restriction.find(f'{self.ns_prefix}fractionDigits', self.NAMESPACES)
+            frac_digits = restriction.find(tags['fractionDigits'])
             if frac_digits is not None:
-                frac_val = self._get_attribute(frac_digits, 'value')
-                restrictions.append(f"FractionDigits: {frac_val}")
+                frac_val = frac_digits.get('value', '')
+                restrictions['FractionDigits'] = frac_val
                 restriction_info['validation_rules'].append(f"✓ Up to {frac_val} decimal places")
         
-        restriction_info['restrictions'] = ' | '.join(restrictions) if restrictions else ''
+        restriction_info['restrictions'] = ' | '.join(f"{key}: {value}" for key, value in restrictions.items())
+        self._restriction_cache[simple_type] = restriction_info
         return restriction_info
     
     def parse(self):
@@ -425,9 +504,9 @@ class XSDParser:
         sequence = {'count': 0}
         
         # Find root elements
-        for elem in self.root.findall(f'{self.ns_prefix}element', self.NAMESPACES):
-            element_name = self._get_attribute(elem, 'name')
-            element_type = self._get_attribute(elem, 'type')
+        for elem in self.root_elements:
+            element_name = elem.get('name', '')
+            element_type = elem.get('type', '')
             
             element_data = self._expand_element(
                 elem, element_name, element_type,
@@ -442,75 +521,106 @@ class XSDParser:
         """Expand an element following type references"""
         sequence['count'] += 1
         
-        min_occurs = self._get_attribute(element_node, 'minOccurs') or '1'
-        max_occurs = self._get_attribute(element_node, 'maxOccurs') or '1'
-        default = self._get_attribute(element_node, 'default')
-        fixed = self._get_attribute(element_node, 'fixed')
+        # Names, types and occurrence values repeat across the whole structure;
+        # interned, every node shares one string object per distinct value
+        element_name = sys.intern(element_name)
+        element_type = sys.intern(element_type)
+        get = element_node.get
+        min_occurs = sys.intern(get('minOccurs') or '1')
+        max_occurs = sys.intern(get('maxOccurs') or '1')
+        default = get('default', '')
+        fixed = get('fixed', '')
         annotation = self._get_annotation(element_node)
         
-        element_data = {
-            'sequence': sequence['count'],
-            'level': level,
-            'full_path': path,
-            'name': element_name,
-            'type': element_type,
-            'min_occurs': min_occurs,
-            'max_occurs': max_occurs,
-            'default': default,
-            'fixed': fixed,
-            'annotation': annotation,
-            'field_class': self._classify_field_from_xsd(element_node),
-            'restrictions': '',
-            'validation_rules': [],
-            'node_type': 'element',
-            'choice_info': parent_choice_info or '',
-            'business_entity': BusinessEntityMapper.get_entity(element_name, path),
-            'sample_value': '',
-            'children': []
-        }
+        element_data = SchemaNode(
+            sequence=sequence['count'],
+            level=level,
+            full_path=path,
+            name=element_name,
+            type=element_type,
+            min_occurs=min_occurs,
+            max_occurs=max_occurs,
+            default=default,
+            fixed=fixed,
+            annotation=annotation,
+            node_type='element',
+            business_entity=BusinessEntityMapper.get_entity(element_name, path),
+            field_class=self._classify_field_from_xsd(element_node),
+            choice_info=parent_choice_info or '',
+        )
         
         # Check for inline type
-        inline_complex = element_node.find(f'{self.ns_prefix}complexType', self.NAMESPACES)
-        inline_simple = element_node.find(f'{self.ns_prefix}simpleType', self.NAMESPACES)
+        restrictions_dict = {}
+        inline_complex = element_node.find(self._tags['complexType'])
+        inline_simple = element_node.find(self._tags['simpleType'])
         
         if inline_complex is not None:
             children = self._expand_complex_type(inline_complex, path, level + 1, sequence)
-            element_data['children'] = children
+            element_data.children = children
         elif inline_simple is not None:
             restriction_info = self._parse_simple_type_restrictions(inline_simple)
-            element_data['type'] = restriction_info['base_type']
-            element_data['restrictions'] = restriction_info['restrictions']
-            element_data['validation_rules'] = restriction_info['validation_rules']
+            element_data.type = restriction_info['base_type']
+            element_data.restrictions = restriction_info['restrictions']
+            restrictions_dict = restriction_info['restrictions_dict']
+            element_data.validation_rules = restriction_info['validation_rules']
         elif element_type:
             type_def = self._get_type_definition(element_type)
             if type_def is not None:
                 tag_name = self._get_tag_name(type_def)
                 if tag_name == 'complexType':
-                    children = self._expand_complex_type(type_def, path, level + 1, sequence)
-                    element_data['children'] = children
+                    children = self._expand_named_complex_type(element_type, type_def, path, level + 1, sequence)
+                    element_data.children = children
                 elif tag_name == 'simpleType':
                     restriction_info = self._parse_simple_type_restrictions(type_def)
-                    element_data['type'] = restriction_info['base_type']
-                    element_data['restrictions'] = restriction_info['restrictions']
-                    element_data['validation_rules'] = restriction_info['validation_rules']
+                    element_data.type = restriction_info['base_type']
+                    element_data.restrictions = restriction_info['restrictions']
+                    restrictions_dict = restriction_info['restrictions_dict']
+                    element_data.validation_rules = restriction_info['validation_rules']
         
         # Generate sample value
-        element_data['sample_value'] = SampleValueGenerator.generate(
-            element_name, element_data['type'], 
-            element_data['restrictions'], path
+        element_data.sample_value = SampleValueGenerator.generate(
+            element_name, element_data.type, 
+            restrictions_dict, path
         )
         
         return element_data
     
+    def _expand_named_complex_type(self, type_name, complex_type, parent_path, level, sequence):
+        """Expand a named complex type, copying its first expansion on later uses"""
+        cached = self._expand_cache.get(type_name)
+        if cached is None:
+            children = self._expand_complex_type(complex_type, parent_path, level, sequence)
+            self._expand_cache[type_name] = (children, len(parent_path), level)
+            return children
+        
+        template, prefix_len, template_level = cached
+        return self._copy_expansion(template, prefix_len, parent_path, level - template_level, sequence)
+    
+    def _copy_expansion(self, template, prefix_len, parent_path, level_shift, sequence):
+        """Re-home an expanded subtree under a new parent path, numbering it in document order"""
+        copies = []
+        for node in template:
+            sequence['count'] += 1
+            full_path = parent_path + node.full_path[prefix_len:]
+            copies.append(SchemaNode(
+                sequence['count'], node.level + level_shift, full_path, node.name, node.type,
+                node.min_occurs, node.max_occurs, node.default, node.fixed, node.annotation,
+                node.node_type, BusinessEntityMapper.get_entity(node.name.lstrip('@'), full_path),
+                node.field_class, node.restrictions, node.validation_rules,
+                node.choice_info, node.sample_value,
+                self._copy_expansion(node.children, prefix_len, parent_path, level_shift, sequence),
+            ))
+        return copies
+    
     def _expand_complex_type(self, complex_type, parent_path, level, sequence):
         """Expand complex type - prioritize restricted definitions over base types"""
         children = []
         
         # Handle complexContent
-        complex_content = complex_type.find(f'{self.ns_prefix}complexContent', self.NAMESPACES)
+        complex_content = complex_type.find(self._tags['complexContent'])
         if complex_content is not None:
-            restriction = complex_content.find(f'{self.ns_prefix}restriction', self.NAMESPACES)
-            extension = complex_content.find(f'{self.ns_prefix}extension', self.NAMESPACES)
+            restriction = complex_content.find(self._tags['restriction'])
+            extension = complex_content.find(self._tags['extension'])
             
             if restriction is not None:
                 # For restrictions, use the restricted elements directly (they have Yellow/White annotations)
@@ -522,14 +632,14 @@ class XSDParser:
                     children.extend(restricted_children)
                 else:
                     # If restriction has no elements, fall back to base type
-                    base = self._get_attribute(restriction, 'base')
+                    base = restriction.get('base', '')
                     base_type_def = self._get_type_definition(base)
                     if base_type_def is not None:
                         children.extend(self._expand_complex_type(base_type_def, parent_path, level, sequence))
             
             elif extension is not None:
                 # For extensions, include both base type and extended content
-                base = self._get_attribute(extension, 'base')
+                base = extension.get('base', '')
                 base_type_def = self._get_type_definition(base)
                 if base_type_def is not None:
                     children.extend(self._expand_complex_type(base_type_def, parent_path, level, sequence))
@@ -542,12 +652,14 @@ class XSDParser:
     def _parse_type_content(self, type_node, parent_path, level, sequence):
         """Parse type content with CHOICE detection"""
         children = []
+        tags = self._tags
         
         # Handle sequence
-        for seq in type_node.findall(f'{self.ns_prefix}sequence', self.NAMESPACES):
-            for child_elem in seq.findall(f'{self.ns_prefix}element', self.NAMESPACES):
-                child_name = self._get_attribute(child_elem, 'name')
-                child_type = self._get_attribute(child_elem, 'type')
+        for seq in type_node.findall(tags['sequence']):
+            for child_elem in seq.findall(tags['element']):
+                get = child_elem.get
+                child_name = get('name', '')
+                child_type = get('type', '')
                 child_path = f"{parent_path}/{child_name}"
                 
                 child_data = self._expand_element(
@@ -557,16 +669,18 @@ class XSDParser:
                 children.append(child_data)
         
         # Handle CHOICE - mark alternatives
-        for choice in type_node.findall(f'{self.ns_prefix}choice', self.NAMESPACES):
-            choice_elements = choice.findall(f'{self.ns_prefix}element', self.NAMESPACES)
+        for choice in type_node.findall(tags['choice']):
+            choice_elements = choice.findall(tags['element'])
             total_choices = len(choice_elements)
             
             for idx, child_elem in enumerate(choice_elements, 1):
-                child_name = self._get_attribute(child_elem, 'name')
-                child_type = self._get_attribute(child_elem, 'type')
+                get = child_elem.get
+                child_name = get('name', '')
+                child_type = get('type', '')
                 child_path = f"{parent_path}/{child_name}"
                 
-                choice_info = f"[CHOICE {idx} of {total_choices}]"
+                # Labels repeat for every choice of the same shape; share one string each
+                choice_info = sys.intern(f"[CHOICE {idx} of {total_choices}]")
                 
                 child_data = self._expand_element(
                     child_elem, child_name, child_type,
@@ -575,10 +689,11 @@ class XSDParser:
                 children.append(child_data)
         
         # Handle all
-        for all_elem in type_node.findall(f'{self.ns_prefix}all', self.NAMESPACES):
-            for child_elem in all_elem.findall(f'{self.ns_prefix}element', self.NAMESPACES):
-                child_name = self._get_attribute(child_elem, 'name')
-                child_type = self._get_attribute(child_elem, 'type')
+        for all_elem in type_node.findall(tags['all']):
+            for child_elem in all_elem.findall(tags['element']):
+                get = child_elem.get
+                child_name = get('name', '')
+                child_type = get('type', '')
                 child_path = f"{parent_path}/{child_name}"
                 
                 child_data = self._expand_element(
@@ -588,56 +703,55 @@ class XSDParser:
                 children.append(child_data)
         
         # Handle attributes
-        for attr in type_node.findall(f'{self.ns_prefix}attribute', self.NAMESPACES):
+        for attr in type_node.findall(tags['attribute']):
             sequence['count'] += 1
-            attr_name = self._get_attribute(attr, 'name')
-            attr_type = self._get_attribute(attr, 'type')
-            use = self._get_attribute(attr, 'use') or 'optional'
-            default = self._get_attribute(attr, 'default')
-            fixed = self._get_attribute(attr, 'fixed')
+            get = attr.get
+            attr_name = get('name', '')
+            attr_type = get('type', '')
+            use = get('use') or 'optional'
+            default = get('default', '')
+            fixed = get('fixed', '')
             annotation = self._get_annotation(attr)
             
             attr_path = f"{parent_path}/@{attr_name}"
             
-            attr_data = {
-                'sequence': sequence['count'],
-                'level': level,
-                'full_path': attr_path,
-                'name': f"@{attr_name}",
-                'type': attr_type or 'string',
-                'min_occurs': '1' if use == 'required' else '0',
-                'max_occurs': '1',
-                'default': default,
-                'fixed': fixed,
-                'annotation': annotation,
-                'restrictions': '',
-                'validation_rules': [],
-                'node_type': 'attribute',
-                'choice_info': '',
-                'business_entity': BusinessEntityMapper.get_entity(attr_name, attr_path),
-                'sample_value': '',
-                'children': []
-            }
+            attr_data = SchemaNode(
+                sequence=sequence['count'],
+                level=level,
+                full_path=attr_path,
+                name=sys.intern(f"@{attr_name}"),
+                type=sys.intern(attr_type) if attr_type else 'string',
+                min_occurs='1' if use == 'required' else '0',
+                max_occurs='1',
+                default=default,
+                fixed=fixed,
+                annotation=annotation,
+                node_type='attribute',
+                business_entity=BusinessEntityMapper.get_entity(attr_name, attr_path),
+            )
             
             # Check for inline simple type
-            inline_simple = attr.find(f'{self.ns_prefix}simpleType', self.NAMESPACES)
+            restrictions_dict = {}
+            inline_simple = attr.find(tags['simpleType'])
             if inline_simple is not None:
                 restriction_info = self._parse_simple_type_restrictions(inline_simple)
-                attr_data['type'] = restriction_info['base_type']
-                attr_data['restrictions'] = restriction_info['restrictions']
-                attr_data['validation_rules'] = restriction_info['validation_rules']
+                attr_data.type = restriction_info['base_type']
+                attr_data.restrictions = restriction_info['restrictions']
+                restrictions_dict = restriction_info['restrictions_dict']
+                attr_data.validation_rules = restriction_info['validation_rules']
             elif attr_type:
                 type_def = self._get_type_definition(attr_type)
                 if type_def is not None and self._get_tag_name(type_def) == 'simpleType':
                     restriction_info = self._parse_simple_type_restrictions(type_def)
-                    attr_data['type'] = restriction_info['base_type']
-                    attr_data['restrictions'] = restriction_info['restrictions']
-                    attr_data['validation_rules'] = restriction_info['validation_rules']
+                    attr_data.type = restriction_info['base_type']
+                    attr_data.restrictions = restriction_info['restrictions']
+                    restrictions_dict = restriction_info['restrictions_dict']
+                    attr_data.validation_rules = restriction_info['validation_rules']
             
             # Generate sample value
-            attr_data['sample_value'] = SampleValueGenerator.generate(
-                attr_name, attr_data['type'],
-                attr_data['restrictions'], attr_path
+            attr_data.sample_value = SampleValueGenerator.generate(
+                attr_name, attr_data.type,
+                restrictions_dict, attr_path
             )
             
             children.append(attr_data)
@@ -645,50 +759,170 @@ class XSDParser:
         return children
     
     def flatten_tree(self, elements):
-        """Flatten tree structure"""
+        """Flatten tree structure (pre-order, without recursion)"""
         flat_list = []
-        
-        def flatten_recursive(element):
-            flat_list.append(element)
-            for child in element.get('children', []):
-                flatten_recursive(child)
-        
-        for elem in elements:
-            flatten_recursive(elem)
-        
+        append = flat_list.append
+        # Quick Reference rows are picked out here, in the same pass
+        quick_ref = []
+        quick_ref_append = quick_ref.append
+        stack = list(reversed(elements))
+        # One indent string per depth, shared by every row at that level
+        indents = {}
+        
+        while stack:
+            element = stack.pop()
+            level = element.level
+            indent = indents.get(level)
+            if indent is None:
+                indent = indents[level] = '  ' * level
+            element.indented_name = indent + element.name
+            validation_rules = element.validation_rules
+            if validation_rules:
+                element.validation_text = '\n'.join(validation_rules)
+            if level <= QUICK_REF_MAX_LEVEL and element.node_type == 'element':
+                quick_ref_append(element)
+            append(element)
+            children = element.children
+            if children:
+                stack.extend(reversed(children))
+        
+        self.quick_ref_elements = quick_ref
         return flat_list
 
 
+# Shared workbook styles - the write-only sheets attach these to every styled
+# cell, so build them once rather than per sheet or per row. Colours are full
+# ARGB with an opaque alpha; a bare RRGGBB is stored as 00RRGGBB
+HEADER_FILL = PatternFill(start_color='FF366092', end_color='FF366092', fill_type='solid')
+HEADER_FONT = Font(bold=True, color='FFFFFFFF')
+TITLE_FONT = Font(size=16, bold=True, color='FFFFFFFF')
+LABEL_FONT = Font(bold=True)
+YELLOW_FIELD_FILL = PatternFill(start_color='FFFFF8DC', end_color='FFFFF8DC', fill_type='solid')
+CHOICE_FILL = PatternFill(start_color='FFFFE6CC', end_color='FFFFE6CC', fill_type='solid')
+CHOICE_FONT = Font(bold=True, color='FFFF6600')
+ATTRIBUTE_FONT = Font(color='FFFF6600')
+CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+WRAP_TOP_ALIGN = Alignment(wrap_text=True, vertical='top')
+
+# XML Structure columns, read from each SchemaNode in a single call
+_STRUCTURE_ROW_COLS = attrgetter(
+    'sequence', 'level', 'full_path', 'indented_name', 'choice_info', 'type',
+    'min_occurs', 'max_occurs', 'field_class', 'sample_value', 'business_entity',
+    'validation_text', 'annotation')
+
+
 class ExcelExporter:
     """Export to Excel with all enhancements"""
     
+    # Column widths per sheet, applied before the first row is written
+    _METADATA_COL_WIDTHS = (('A', 25), ('B', 60))
+    _STRUCTURE_COL_WIDTHS = (
+        ('A', 6), ('B', 5), ('C', 55), ('D', 30), ('E', 18), ('F', 25), ('G', 5), ('H', 5),
+        ('I', 25),  # Field Classification
+        ('J', 30),  # Sample Value
+        ('K', 35),  # Business Entity
+        ('L', 40),  # Validation Rules
+        ('M', 50),  # Documentation
+    )
+    _QUICKREF_COL_WIDTHS = (
+        ('A', 60), ('B', 30), ('C', 10),
+        ('D', 30),  # Field Classification
+        ('E', 35), ('F', 35),
+    )
+    
     def __init__(self, output_file, metadata):
         self.output_file = output_file
         self.metadata = metadata
-        self.wb = Workbook()
-    
-    def _classify_field(self, element_name, min_occurs, annotation):
-        """
-        Classify field - NO INFERENCE
-        Only mark as Yellow/White if we have explicit data
-        Since this tool works with flat elements (no XSD access), mark all as NA
-        """
-        # This tool doesn't have access to XSD annotations
-        # All classification happens in the parser
-        return '⚫ NA (Not in XSD)'
+        # Write-only: rows stream to disk as they are appended
+        self.wb = Workbook(write_only=True)
+        # Registered style array per combination of the shared style objects
+        self._style_arrays = {}
+    
+    def _styled_cell(self, ws, value, font=None, fill=None, alignment=None):
+        """Build a write-only cell with its styles attached before it is appended"""
+        cell = WriteOnlyCell(ws, value=value)
+        # The styles are module constants, so their identities make a cheap key
+        key = (id(font), id(fill), id(alignment))
+        style_array = self._style_arrays.get(key)
+        # Sharing uses openpyxl's private Cell._style (tested with 3.1); if it
+        # is ever missing, every cell goes through the public setters instead
+        if style_array is not None:
+            try:
+                # Cells are never restyled once built, so they can share the array
+                cell._style = style_array
+                return cell
+            except AttributeError:
+                pass
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        try:
+            self._style_arrays[key] = cell._style
+        except AttributeError:
+            pass
+        return cell
+    
+    def _temp_output(self):
+        """Private temp file beside the output, swapped into place once complete"""
+        fd, tmp_file = tempfile.mkstemp(dir=Path(self.output_file).resolve().parent, suffix='.tmp')
+        os.close(fd)
+        # mkstemp creates the file owner-only; give it the usual umask permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_file, 0o666 & ~umask)
+        return tmp_file
+    
+    @staticmethod
+    def _discard(tmp_file):
+        """Remove the temp file of a failed export"""
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+    
+    def _save(self):
+        """Stream the workbook to a temp file, then swap it into place"""
+        tmp_file = self._temp_output()
+        try:
+            self.wb.save(tmp_file)
+            os.replace(tmp_file, self.output_file)
+        except BaseException:
+            self._discard(tmp_file)
+            raise
+    
+    def _set_column_widths(self, ws, widths):
+        """Apply (letter, width) pairs to a sheet's column dimensions"""
+        column_dimensions = ws.column_dimensions
+        for letter, width in widths:
+            column_dimensions[letter].width = width
+    
+    def _append_header(self, ws, headers):
+        """Append the styled header row of a sheet"""
+        ws.append([self._styled_cell(ws, h, font=HEADER_FONT, fill=HEADER_FILL, alignment=CENTER_ALIGN)
+                   for h in headers])
 
-    def export(self, flat_elements):
+    def export(self, flat_elements, quick_ref_elements=None):
         """Export with multiple sheets"""
-        # Remove default sheet
-        if 'Sheet' in self.wb.sheetnames:
-            self.wb.remove(self.wb['Sheet'])
+        # Both element sheets list rows by sequence
+        # (flatten_tree already yields document order, so these are linear passes)
+        by_sequence = attrgetter('sequence')
+        elements_by_sequence = sorted(flat_elements, key=by_sequence)
+        if quick_ref_elements is None:
+            # Filter to show only elements (not attributes) at certain levels
+            quick_ref_elements = [e for e in elements_by_sequence
+                                  if e.node_type == 'element' and e.level <= QUICK_REF_MAX_LEVEL]
+        else:
+            quick_ref_elements = sorted(quick_ref_elements, key=by_sequence)
         
         # Create sheets
         self._create_metadata_sheet()
-        self._create_structure_sheet(flat_elements)
-        self._create_quick_reference_sheet(flat_elements)
+        self._create_structure_sheet(elements_by_sequence)
+        self._create_quick_reference_sheet(quick_ref_elements)
         
-        self.wb.save(self.output_file)
+        self._save()
         print(f"\n✅ Excel file saved: {self.output_file}")
         print(f"   📊 Total elements: {len(flat_elements)}")
         print(f"   📄 Sheets created: 3 (Metadata, Full Structure, Quick Reference)")
@@ -696,14 +930,14 @@ class ExcelExporter:
     def _create_metadata_sheet(self):
         """Create sheet with ISO 20022 metadata"""
         ws = self.wb.create_sheet("Message Metadata", 0)
+        # Sheet-level settings must be in place before the first row is written
+        self._set_column_widths(ws, self._METADATA_COL_WIDTHS)
         
         # Title
-        ws['A1'] = "ISO 20022 Message Metadata"
-        ws['A1'].font = Font(size=16, bold=True, color='FFFFFF')
-        ws['A1'].fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        ws.merge_cells('A1:B1')
+        ws.append([self._styled_cell(ws, "ISO 20022 Message Metadata", font=TITLE_FONT, fill=HEADER_FILL)])
+        ws.merged_cells.add('A1:B1')
+        ws.append([])
         
-        row = 3
         metadata_items = [
             ('Message Type', self.metadata.get('message_type', 'N/A')),
             ('Root Element', self.metadata.get('root_element', 'N/A')),
@@ -716,158 +950,120 @@ class ExcelExporter:
         ]
         
         for label, value in metadata_items:
-            ws[f'A{row}'] = label
-            ws[f'B{row}'] = value
-            ws[f'A{row}'].font = Font(bold=True)
-            row += 1
-        
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 60
+            ws.append([self._styled_cell(ws, label, font=LABEL_FONT), value])
     
     def _create_structure_sheet(self, flat_elements):
         """Create main structure sheet"""
         ws = self.wb.create_sheet("XML Structure")
         
+        # Column widths
+        self._set_column_widths(ws, self._STRUCTURE_COL_WIDTHS)
+        
+        # Freeze panes
+        ws.freeze_panes = 'D2'
+        
         # Headers - ADD Field Classification
         headers = ['Seq', 'Lvl', 'Full XML Path', 'Element', 'Choice', 'Type', 
                    'Min', 'Max', 'Field Class', 'Sample Value', 'Business Entity', 'Validation Rules', 'Documentation']
-        ws.append(headers)
-        
-        # Style headers
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF')
-        
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        self._append_header(ws, headers)
         
-        # Sort by sequence
-        flat_elements_sorted = sorted(flat_elements, key=lambda x: x.get('sequence', 0))
-        
-        # Add data
-        for elem in flat_elements_sorted:
-            level = elem['level']
-            indent = '  ' * level
-            
-            # Classify field (yellow/white)
-            field_class = elem.get('field_class', '⚫ NA (Not in XSD)')
-            
-            # Format validation rules
-            validation_rules = elem.get('validation_rules', [])
-            validation_text = '\n'.join(validation_rules) if validation_rules else ''
-            
-            row = [
-                elem.get('sequence', ''),
-                level,
-                elem.get('full_path', ''),
-                indent + elem['name'],
-                elem.get('choice_info', ''),
-                elem.get('type', ''),
-                elem.get('min_occurs', ''),
-                elem.get('max_occurs', ''),
-                field_class,  # NEW: Field Classification
-                elem.get('sample_value', ''),
-                elem.get('business_entity', ''),
-                validation_text,
-                elem.get('annotation', '')
-            ]
-            ws.append(row)
-            
-            row_num = ws.max_row
+        # Add data - rows are streamed straight into the write-only sheet
+        append = ws.append
+        for row in self._structure_rows(ws, flat_elements):
+            append(row)
+    
+    def _structure_rows(self, ws, elements):
+        """Yield the XML Structure data rows, one element at a time"""
+        styled_cell = self._styled_cell
+        for elem in elements:
+            # Indented name and validation text are prepared by flatten_tree
+            row = list(_STRUCTURE_ROW_COLS(elem))
+            indented_name = row[3]
+            validation_text = row[11]
             
             # Highlight Yellow fields
-            if '🟡' in field_class:
-                for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M']:
-                    ws[f'{col}{row_num}'].fill = PatternFill(start_color='FFF8DC', end_color='FFF8DC', fill_type='solid')
+            row_fill = YELLOW_FIELD_FILL if elem.field_class == FIELD_CLASS_YELLOW else None
+            
+            if row_fill is not None:
+                row = [styled_cell(ws, value, fill=row_fill) for value in row]
             
             # Highlight choices
-            if elem.get('choice_info'):
-                ws[f'E{row_num}'].fill = PatternFill(start_color='FFE6CC', end_color='FFE6CC', fill_type='solid')
-                ws[f'E{row_num}'].font = Font(bold=True, color='FF6600')
+            if elem.choice_info:
+                row[4] = styled_cell(ws, elem.choice_info, font=CHOICE_FONT, fill=CHOICE_FILL)
             
             # Color attributes
-            if elem.get('node_type') == 'attribute':
-                ws[f'D{row_num}'].font = Font(color='FF6600')
+            if elem.node_type == 'attribute':
+                row[3] = styled_cell(ws, indented_name, font=ATTRIBUTE_FONT, fill=row_fill)
             
             # Wrap text
-            ws[f'L{row_num}'].alignment = Alignment(wrap_text=True, vertical='top')
-            ws[f'M{row_num}'].alignment = Alignment(wrap_text=True, vertical='top')
-        
-        # Column widths - UPDATED for new column
-        ws.column_dimensions['A'].width = 6
-        ws.column_dimensions['B'].width = 5
-        ws.column_dimensions['C'].width = 55
-        ws.column_dimensions['D'].width = 30
-        ws.column_dimensions['E'].width = 18
-        ws.column_dimensions['F'].width = 25
-        ws.column_dimensions['G'].width = 5
-        ws.column_dimensions['H'].width = 5
-        ws.column_dimensions['I'].width = 25  # Field Classification
-        ws.column_dimensions['J'].width = 30  # Sample Value
-        ws.column_dimensions['K'].width = 35  # Business Entity
-        ws.column_dimensions['L'].width = 40  # Validation Rules
-        ws.column_dimensions['M'].width = 50  # Documentation
-        
-        # Freeze panes
-        ws.freeze_panes = 'D2'
+            row[11] = styled_cell(ws, validation_text, fill=row_fill, alignment=WRAP_TOP_ALIGN)
+            row[12] = styled_cell(ws, elem.annotation, fill=row_fill, alignment=WRAP_TOP_ALIGN)
+            
+            yield row
     
-    def _create_quick_reference_sheet(self, flat_elements):
+    def _create_quick_reference_sheet(self, key_elements):
         """Create quick reference sheet with key fields only"""
         ws = self.wb.create_sheet("Quick Reference")
         
-        # Headers - ADD Field Classification
-        headers = ['Full Path', 'Element', 'Required', 'Field Class', 'Sample Value', 'Business Entity']
-        ws.append(headers)
-        
-        # Style headers
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF')
+        # Column widths
+        self._set_column_widths(ws, self._QUICKREF_COL_WIDTHS)
         
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        # Freeze panes
+        ws.freeze_panes = 'A2'
         
-        # Filter to show only elements (not attributes) at certain levels
-        key_elements = [e for e in flat_elements 
-                       if e.get('node_type') == 'element' and e.get('level', 0) <= 5]
-        key_elements_sorted = sorted(key_elements, key=lambda x: x.get('sequence', 0))
+        # Headers - ADD Field Classification
+        headers = ['Full Path', 'Element', 'Required', 'Field Class', 'Sample Value', 'Business Entity']
+        self._append_header(ws, headers)
         
-        for elem in key_elements_sorted:
-            is_required = 'Yes' if elem.get('min_occurs', '0') != '0' else 'No'
-            field_class = self._classify_field(elem.get('name', ''), elem.get('min_occurs', '1'), elem.get('annotation', ''))
+        append = ws.append
+        for row in self._quick_reference_rows(ws, key_elements):
+            append(row)
+    
+    def _quick_reference_rows(self, ws, key_elements):
+        """Yield the Quick Reference data rows, one key element at a time"""
+        for elem in key_elements:
+            is_required = 'Yes' if elem.min_occurs != '0' else 'No'
+            field_class = elem.field_class
             
             row = [
-                elem.get('full_path', ''),
-                elem.get('name', ''),
+                elem.full_path,
+                elem.name,
                 is_required,
                 field_class,  # NEW
-                elem.get('sample_value', ''),
-                elem.get('business_entity', '')
+                elem.sample_value,
+                elem.business_entity
             ]
-            ws.append(row)
             
             # Highlight Yellow fields
-            row_num = ws.max_row
-            if '🟡' in field_class:
-                for col in ['A', 'B', 'C', 'D', 'E', 'F']:
-                    ws[f'{col}{row_num}'].fill = PatternFill(start_color='FFF8DC', end_color='FFF8DC', fill_type='solid')
-        
-        # Column widths - UPDATED
-        ws.column_dimensions['A'].width = 60
-        ws.column_dimensions['B'].width = 30
-        ws.column_dimensions['C'].width = 10
-        ws.column_dimensions['D'].width = 25  # Field Classification
-        ws.column_dimensions['E'].width = 30
-        ws.column_dimensions['F'].width = 35
-        ws.column_dimensions['B'].width = 30
-        ws.column_dimensions['C'].width = 10
-        ws.column_dimensions['D'].width = 30
-        ws.column_dimensions['E'].width = 35
-        
-        # Freeze panes
-        ws.freeze_panes = 'A2'
+            if field_class == FIELD_CLASS_YELLOW:
+                row = [self._styled_cell(ws, value, fill=YELLOW_FIELD_FILL) for value in row]
+            yield row
+
+
+class XlsxWriterExporter(XlsxWriterStyles, ExcelExporter):
+    """Same documentation workbook as ExcelExporter, written by xlsxwriter"""
+    
+    def __init__(self, output_file, metadata):
+        self.output_file = output_file
+        self.metadata = metadata
+        # constant_memory flushes each row as soon as the next one starts; the
+        # file is built beside the target and swapped into place once closed
+        self._tmp_file = self._temp_output()
+        self.wb = XlsxWriterBook(self._tmp_file)
+        self._formats = {}
+    
+    def export(self, flat_elements, quick_ref_elements=None):
+        """Export with multiple sheets, dropping the temp file if anything fails"""
+        try:
+            super().export(flat_elements, quick_ref_elements)
+        except BaseException:
+            self._discard(self._tmp_file)
+            raise
+    
+    def _save(self):
+        """Close the xlsxwriter workbook and swap it into place"""
+        self.wb.save(self._tmp_file)
+        os.replace(self._tmp_file, self.output_file)
 
 
 def main():
@@ -876,6 +1072,8 @@ def main():
     )
     parser.add_argument('xsd_file', help='Path to XSD file')
     parser.add_argument('-o', '--output', help='Output Excel file', default='xml_structure_enhanced.xlsx')
+    parser.add_argument('--writer', choices=['openpyxl', 'xlsxwriter'], default='openpyxl',
+                       help='Excel writer backend (xlsxwriter streams with constant memory)')
     
     args = parser.parse_args()
     
@@ -888,6 +1086,7 @@ def main():
     print(f"{'='*70}")
     print(f"\n📂 Parsing: {args.xsd_file}")
     print("🔧 Features: Choice indicators, Sample values, Validation rules, Business mapping")
+    print(f"⚙️  XML backend: {'lxml' if HAS_LXML else 'xml.etree (install lxml for faster parsing)'}")
     print("\n⏳ Processing...")
     
     # Parse
@@ -896,8 +1095,12 @@ def main():
     flat_elements = xsd_parser.flatten_tree(elements)
     
     # Export
-    exporter = ExcelExporter(args.output, xsd_parser.metadata)
-    exporter.export(flat_elements)
+    if args.writer == 'xlsxwriter' and not HAS_XLSXWRITER:
+        print("   ⚠️  xlsxwriter not installed - falling back to openpyxl")
+        args.writer = 'openpyxl'
+    exporter_class = XlsxWriterExporter if args.writer == 'xlsxwriter' else ExcelExporter
+    exporter = exporter_class(args.output, xsd_parser.metadata)
+    exporter.export(flat_elements, xsd_parser.quick_ref_elements)
     
     print(f"\n{'='*70}")
     print("✅ COMPLETE!")
@@ -906,29 +1109,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-    def _classify_field(self, elem_name, min_occurs='1', annotation=''):
-        """
-        Classify field from XSD - NO INFERENCE, only real annotations
-        Note: This tool doesn't have access to element objects, so can't read XSD directly
-        Returns NA for all since we don't parse XSD annotations here
-        """
-        # This tool processes flat elements after parsing
-        # Real classification happens in the parser
-        # For now, return NA since we can't access XSD annotations from flat elements
-        return '⚫ NA (Not in XSD)'
-
-    def _classify_field_from_xsd(self, element):
-        """Read Yellow/White from XSD annotations - NO INFERENCE"""
-        # Check XSD annotation
-        annotation = element.find('xs:annotation', self.ns)
-        if annotation is not None:
-            docs = annotation.findall('xs:documentation', self.ns)
-            for doc in docs:
-                source = doc.get('source', '').strip()
-                if source == 'Yellow Field':
-                    return '🟡 Yellow (ISO 20022 Spec)'
-                elif source == 'White Field':
-                    return '⚪ White (ISO 20022 Spec)'
-        
-        return '⚫ NA (Not in XSD)'
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+xlsxwriter backend for the openpyxl write-only report code
+Lets a report written against openpyxl's write-only API (create_sheet, append,
+column_dimensions, merged_cells, freeze_panes) stream through an xlsxwriter
+constant_memory workbook instead
+"""
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+
+class XlsxWriterCell:
+    """A value and its xlsxwriter format, appended like a WriteOnlyCell"""
+    __slots__ = ('value', 'format')
+    
+    def __init__(self, value, cell_format):
+        self.value = value
+        self.format = cell_format
+
+
+class _XlsxWriterColumn:
+    """column_dimensions entry that forwards width to set_column()"""
+    
+    def __init__(self, worksheet, letter):
+        self._worksheet = worksheet
+        self._letter = letter
+    
+    @property
+    def width(self):
+        return None
+    
+    @width.setter
+    def width(self, value):
+        self._worksheet.set_column(f'{self._letter}:{self._letter}', value)
+
+
+class _XlsxWriterColumns:
+    """Mapping-style column_dimensions for an xlsxwriter worksheet"""
+    
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+    
+    def __getitem__(self, letter):
+        return _XlsxWriterColumn(self._worksheet, letter)
+
+
+class _XlsxWriterMerges:
+    """merged_cells.add() that merges the range over the last appended row"""
+    
+    def __init__(self, sheet):
+        self._sheet = sheet
+    
+    def add(self, cell_range):
+        first = self._sheet._last_row[0] if self._sheet._last_row else None
+        if isinstance(first, XlsxWriterCell):
+            self._sheet._worksheet.merge_range(cell_range, first.value, first.format)
+        else:
+            self._sheet._worksheet.merge_range(cell_range, first, None)
+
+
+class XlsxWriterSheet:
+    """The slice of openpyxl's write-only worksheet API the report sheets use"""
+    
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._row = 0
+        self._last_row = None
+        self.column_dimensions = _XlsxWriterColumns(worksheet)
+        self.merged_cells = _XlsxWriterMerges(self)
+    
+    @property
+    def freeze_panes(self):
+        return None
+    
+    @freeze_panes.setter
+    def freeze_panes(self, cell):
+        self._worksheet.freeze_panes(cell)
+    
+    def append(self, row):
+        write = self._worksheet.write
+        row_num = self._row
+        for col, value in enumerate(row):
+            if isinstance(value, XlsxWriterCell):
+                write(row_num, col, value.value, value.format)
+            elif value is not None:
+                write(row_num, col, value)
+        self._last_row = row
+        self._row += 1
+
+
+class XlsxWriterBook:
+    """create_sheet()/save() over an xlsxwriter constant_memory workbook"""
+    
+    def __init__(self, output_file, sheet_class=XlsxWriterSheet):
+        self.workbook = xlsxwriter.Workbook(output_file, {
+            'constant_memory': True,
+            'strings_to_numbers': False,
+            'strings_to_urls': False,
+        })
+        self._sheet_class = sheet_class
+    
+    def create_sheet(self, title, index=None):
+        # Sheets are created in display order, so the index is not needed
+        return self._sheet_class(self.workbook.add_worksheet(title))
+    
+    def save(self, output_file):
+        self.workbook.close()
+
+
+class XlsxWriterStyles:
+    """_styled_cell() for report classes whose self.wb is an XlsxWriterBook
+    
+    Mix in ahead of the openpyxl report class; the subclass sets self.wb and
+    an empty self._formats dict.
+    """
+    
+    def _styled_cell(self, ws, value, font=None, fill=None, alignment=None):
+        """Pair a value with the xlsxwriter format equivalent to its styles"""
+        return XlsxWriterCell(value, self._format(font, fill, alignment))
+    
+    def _format(self, font, fill, alignment):
+        """xlsxwriter format for an openpyxl style combination, created once"""
+        key = (font, fill, alignment)
+        cell_format = self._formats.get(key)
+        if cell_format is None:
+            props = {}
+            if font is not None:
+                if font.b:
+                    props['bold'] = True
+                if font.sz:
+                    props['font_size'] = font.sz
+                if font.color is not None and font.color.rgb:
+                    props['font_color'] = '#' + font.color.rgb[-6:]
+            if fill is not None:
+                props['pattern'] = 1
+                props['bg_color'] = '#' + fill.fgColor.rgb[-6:]
+            if alignment is not None:
+                if alignment.horizontal:
+                    props['align'] = alignment.horizontal
+                if alignment.vertical:
+                    props['valign'] = 'vcenter' if alignment.vertical == 'center' else alignment.vertical
+                if alignment.wrap_text:
+                    props['text_wrap'] = True
+            cell_format = self._formats[key] = self.wb.workbook.add_format(props)
+        return cell_format
@@ -18,11 +18,17 @@ import json
 import argparse
 import os
 import re
+import sys
+import hashlib
+import pickle
+import tempfile
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Set
-from dataclasses import dataclass, asdict
-from copy import deepcopy
+from dataclasses import dataclass
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     from lxml import etree as lxml_etree
@@ -31,6 +37,14 @@ except ImportError:
     HAS_LXML = False
 
 
+XS = '{http://www.w3.org/2001/XMLSchema}'
+XS_ELEMENT = XS + 'element'
+# Nodes that may hold child xs:element declarations of a complex type
+XS_CONTAINERS = frozenset(XS + tag for tag in
+                          ('sequence', 'choice', 'all',
+                           'complexContent', 'extension', 'restriction'))
+
+
 @dataclass
 class TransformAction:
     action: str  # 'mapped', 'added', 'removed', 'renamed', 'transformed', 'default'
@@ -44,17 +58,93 @@ class TransformAction:
 class SchemaAnalyzer:
     """Analyze XSD schema structure"""
     
-    def __init__(self, xsd_file: str):
+    CACHE_DIR = Path.home() / '.cache' / 'xsdbank'
+    CACHE_VERSION = 2
+    
+    def __init__(self, xsd_file: str, use_cache: bool = True):
         self.xsd_file = xsd_file
-        self.tree = ET.parse(xsd_file)
-        self.root = self.tree.getroot()
+        self.tree = None
+        self.root = None
         self.ns = {'xs': 'http://www.w3.org/2001/XMLSchema'}
-        self.target_ns = self.root.get('targetNamespace', '')
+        self.target_ns = ''
         self.elements: Dict[str, Dict] = {}
+        self.parent_path: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self._by_name: Dict[str, List[str]] = {}
         self.type_cache = {}
         
+        cache_file = self._cache_file() if use_cache else None
+        if cache_file is not None and self._load_cache(cache_file):
+            return
+        
+        self.tree = ET.parse(xsd_file)
+        self.root = self.tree.getroot()
+        self.target_ns = self.root.get('targetNamespace', '')
+        
         self._cache_types()
         self._extract_elements()
+        
+        # Tree nodes are only needed during extraction; dropping them keeps
+        # the analyzer small and cheap to pickle across processes
+        self.tree = None
+        self.root = None
+        self.type_cache = {}
+        
+        if cache_file is not None:
+            self._save_cache(cache_file)
+    
+    def _cache_file(self) -> Optional[Path]:
+        """Cache location keyed on the XSD's path, mtime and size"""
+        try:
+            stat = os.stat(self.xsd_file)
+        except OSError:
+            return None
+        key = hashlib.sha1(
+            f"{os.path.abspath(self.xsd_file)}:{stat.st_mtime}:{stat.st_size}:"
+            f"{self.CACHE_VERSION}".encode()
+        ).hexdigest()
+        return self.CACHE_DIR / f"schema_{key}.pkl"
+    
+    def _load_cache(self, cache_file: Path) -> bool:
+        """Restore extracted schema data from disk; False on miss"""
+        try:
+            with open(cache_file, 'rb') as f:
+                data = pickle.load(f)
+            self.target_ns = data['target_ns']
+            self.elements = data['elements']
+            self.parent_path = data['parent_path']
+            self.children = data['children']
+        except Exception:
+            return False
+        self._index_names()
+        return True
+    
+    def _save_cache(self, cache_file: Path):
+        """Persist extracted schema data (plain dicts only, no tree nodes)"""
+        data = {
+            'target_ns': self.target_ns,
+            'elements': self.elements,
+            'parent_path': self.parent_path,
+            'children': self.children,
+        }
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # A private temp file per writer, so concurrent runs never share one
+            fd, tmp_file = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+        finally:
+            # Only left behind if the write or the replace failed
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
     
     def _cache_types(self):
         """Cache all type definitions"""
@@ -66,70 +156,102 @@ class SchemaAnalyzer:
     def _extract_elements(self):
         """Extract all elements with their paths"""
         root_elem = self.root.find('xs:element', self.ns)
-        if root_elem is not None:
-            self._process_element(root_elem, "")
-    
-    def _process_element(self, element, parent_path: str):
-        """Process an element and its children"""
-        elem_name = element.get('name', '')
-        elem_type = element.get('type', '')
-        
-        if not elem_name:
+        if root_elem is None:
             return
         
-        current_path = f"{parent_path}/{elem_name}" if parent_path else elem_name
-        
-        # Store element info
-        self.elements[current_path] = {
-            'name': elem_name,
-            'type': elem_type,
-            'min_occurs': element.get('minOccurs', '1'),
-            'max_occurs': element.get('maxOccurs', '1'),
-            'path': current_path
-        }
+        # Depth-first worklist of (element, parent_path, types being expanded
+        # on that path); children are pushed in reverse so they are visited in
+        # document order
+        work = [(root_elem, "", frozenset())]
+        while work:
+            element, parent_path, expanding = work.pop()
+            elem_name = element.get('name', '')
+            elem_type = element.get('type', '')
+            
+            if not elem_name:
+                continue
+            
+            current_path = f"{parent_path}/{elem_name}" if parent_path else elem_name
+            
+            # Record parent/child links so consumers never re-split paths
+            if current_path not in self.parent_path:
+                self.parent_path[current_path] = parent_path
+                self.children.setdefault(parent_path, []).append(current_path)
+            
+            # Store element info
+            self.elements[current_path] = {
+                'name': elem_name,
+                'type': elem_type,
+                'min_occurs': element.get('minOccurs', '1'),
+                'max_occurs': element.get('maxOccurs', '1'),
+                'path': current_path
+            }
+            
+            # Find the element's complex type (inline or named)
+            complex_type = element.find('xs:complexType', self.ns)
+            if complex_type is None and elem_type:
+                complex_type = self.type_cache.get(elem_type.split(':')[-1])
+            
+            if complex_type is None:
+                continue
+            
+            # A type already being expanded further up this path is recursive;
+            # the element is recorded but not expanded again
+            if complex_type in expanding:
+                continue
+            expanding = expanding | {complex_type}
+            
+            # Collect children from the type's compositor tree
+            children = []
+            for child in self._compositor_elements(complex_type):
+                child_ref = child.get('ref')
+                if child_ref:
+                    ref_name = child_ref.split(':')[-1]
+                    ref_elem = self.root.find(f".//xs:element[@name='{ref_name}']", self.ns)
+                    if ref_elem is not None:
+                        children.append(ref_elem)
+                else:
+                    children.append(child)
+            
+            # Handle complex content extension
+            complex_content = complex_type.find('xs:complexContent', self.ns)
+            if complex_content is not None:
+                extension = complex_content.find('xs:extension', self.ns)
+                if extension is not None:
+                    base_type = extension.get('base', '').split(':')[-1]
+                    base_elem = self.type_cache.get(base_type)
+                    if base_elem is not None:
+                        children.extend(self._compositor_elements(base_elem))
+            
+            work.extend((child, current_path, expanding) for child in reversed(children))
         
-        # Process children
-        self._process_children(element, elem_type, current_path)
+        self._index_names()
     
-    def _process_children(self, element, type_name: str, parent_path: str):
-        """Process child elements"""
-        complex_type = element.find('xs:complexType', self.ns)
-        
-        if complex_type is None and type_name:
-            type_name_clean = type_name.split(':')[-1]
-            complex_type = self.type_cache.get(type_name_clean)
-        
-        if complex_type is None:
-            return
+    def _index_names(self):
+        """Index element paths by element name"""
+        self._by_name = {}
+        for path, info in self.elements.items():
+            self._by_name.setdefault(info['name'], []).append(path)
+    
+    def _compositor_elements(self, type_elem) -> List:
+        """xs:element nodes of a type's compositors, in document order.
         
-        # Process all compositors
-        for compositor in ['xs:sequence', 'xs:choice', 'xs:all']:
-            for comp in complex_type.findall(f'.//{compositor}', self.ns):
-                for child in comp.findall('xs:element', self.ns):
-                    child_ref = child.get('ref')
-                    if child_ref:
-                        ref_name = child_ref.split(':')[-1]
-                        ref_elem = self.root.find(f".//xs:element[@name='{ref_name}']", self.ns)
-                        if ref_elem is not None:
-                            self._process_element(ref_elem, parent_path)
-                    else:
-                        self._process_element(child, parent_path)
-        
-        # Handle complex content extension
-        complex_content = complex_type.find('xs:complexContent', self.ns)
-        if complex_content is not None:
-            extension = complex_content.find('xs:extension', self.ns)
-            if extension is not None:
-                base_type = extension.get('base', '').split(':')[-1]
-                if base_type in self.type_cache:
-                    self._process_children_from_type(self.type_cache[base_type], parent_path)
-    
-    def _process_children_from_type(self, type_elem, parent_path: str):
-        """Process children from a type definition"""
-        for compositor in ['xs:sequence', 'xs:choice', 'xs:all']:
-            for comp in type_elem.findall(f'.//{compositor}', self.ns):
-                for child in comp.findall('xs:element', self.ns):
-                    self._process_element(child, parent_path)
+        Descends only through sequence/choice/all (and complexContent
+        derivations), so elements of nested anonymous types stay with
+        their own parent element.
+        """
+        found = []
+        stack = [iter(type_elem)]
+        while stack:
+            for node in stack[-1]:
+                if node.tag == XS_ELEMENT:
+                    found.append(node)
+                elif node.tag in XS_CONTAINERS:
+                    stack.append(iter(node))
+                    break
+            else:
+                stack.pop()
+        return found
     
     def get_all_paths(self) -> Set[str]:
         """Get all element paths"""
@@ -137,24 +259,50 @@ class SchemaAnalyzer:
     
     def get_element_by_name(self, name: str) -> List[str]:
         """Find elements by name (returns all matching paths)"""
-        return [path for path, info in self.elements.items() 
-                if info['name'] == name]
+        return list(self._by_name.get(name, ()))
 
 
 class XMLTransformer:
     """Transform XML between schema versions"""
     
-    def __init__(self, source_xsd: str, target_xsd: str):
+    # Only the first actions of each kind are kept; counts stay exact
+    MAX_ACTIONS_PER_KIND = 5000
+    
+    def __init__(self, source_xsd: str, target_xsd: str, use_cache: bool = True):
         self.source_xsd = source_xsd
         self.target_xsd = target_xsd
         
-        print("   Analyzing source schema...")
-        self.source_schema = SchemaAnalyzer(source_xsd)
-        print("   Analyzing target schema...")
-        self.target_schema = SchemaAnalyzer(target_xsd)
+        print("   Analyzing source and target schemas...")
+        self.source_schema = self.target_schema = None
+        try:
+            # The two analyses are independent and CPU-bound
+            ex = ProcessPoolExecutor(max_workers=2)
+        except (OSError, NotImplementedError):
+            ex = None
+        if ex is not None:
+            with ex:
+                try:
+                    fs = ex.submit(SchemaAnalyzer, source_xsd, use_cache)
+                    ft = ex.submit(SchemaAnalyzer, target_xsd, use_cache)
+                except OSError:
+                    fs = ft = None
+                if fs is not None:
+                    # Schema errors raised in a worker propagate; only a broken
+                    # pool falls back to analyzing in-process
+                    try:
+                        self.source_schema = fs.result()
+                        self.target_schema = ft.result()
+                    except BrokenProcessPool:
+                        pass
+        if self.target_schema is None:
+            # No worker processes available - analyze in-process
+            self.source_schema = SchemaAnalyzer(source_xsd, use_cache)
+            self.target_schema = SchemaAnalyzer(target_xsd, use_cache)
         
         self.actions: List[TransformAction] = []
+        self.action_counts: Counter = Counter()
         self.field_mappings: Dict[str, str] = {}
+        self._defaults: Dict[str, str] = {}
         
         # Build automatic mappings
         self._build_mappings()
@@ -192,26 +340,41 @@ class XMLTransformer:
     
     def transform(self, source_xml: str, output_xml: str, 
                   preserve_values: bool = True,
-                  add_defaults: bool = True) -> Dict:
+                  add_defaults: bool = True,
+                  legacy: bool = False) -> Dict:
         """Transform XML from source to target schema"""
         self.actions = []
+        self.action_counts = Counter()
+        
+        # Default values are timestamped once per run, not per element
+        now = datetime.now()
+        self._defaults = {
+            'MsgId': f'MSG{now:%Y%m%d%H%M%S}',
+            'CreDtTm': now.strftime('%Y-%m-%dT%H:%M:%S'),
+            'NbOfTxs': '1',
+            'IntrBkSttlmDt': now.strftime('%Y-%m-%d'),
+            'ChrgBr': 'SLEV',
+            'Ccy': 'EUR',
+            'Ctry': 'DE',
+        }
         
-        # Parse source XML
+        # Parse source XML and build source data map
         try:
-            source_tree = ET.parse(source_xml)
-            source_root = source_tree.getroot()
+            if legacy:
+                source_root = ET.parse(source_xml).getroot()
+                
+                # Extract source namespace
+                source_ns = ''
+                if source_root.tag.startswith('{'):
+                    ns_end = source_root.tag.index('}')
+                    source_ns = source_root.tag[1:ns_end]
+                
+                source_data = self._extract_data(source_root, "", source_ns)
+            else:
+                source_data = self._stream_extract_data(source_xml)
         except ET.ParseError as e:
             return {'success': False, 'error': f'Failed to parse source XML: {e}'}
         
-        # Extract source namespace
-        source_ns = ''
-        if source_root.tag.startswith('{'):
-            ns_end = source_root.tag.index('}')
-            source_ns = source_root.tag[1:ns_end]
-        
-        # Build source data map
-        source_data = self._extract_data(source_root, "", source_ns)
-        
         # Create target structure
         target_ns = self.target_schema.target_ns
         target_root = self._build_target_structure(source_data, target_ns, add_defaults)
@@ -219,15 +382,11 @@ class XMLTransformer:
         if target_root is None:
             return {'success': False, 'error': 'Failed to build target structure'}
         
-        # Write output
+        # Write output with the target namespace as the default namespace
         target_tree = ET.ElementTree(target_root)
         ET.indent(target_tree, space="  ")
-        
-        # Register namespace
-        if target_ns:
-            ET.register_namespace('', target_ns)
-        
-        target_tree.write(output_xml, encoding='UTF-8', xml_declaration=True)
+        target_tree.write(output_xml, encoding='UTF-8', xml_declaration=True,
+                          default_namespace=target_ns or None)
         
         # Validate output if lxml available
         validation_errors = []
@@ -242,18 +401,66 @@ class XMLTransformer:
             'source_schema': os.path.basename(self.source_xsd),
             'target_schema': os.path.basename(self.target_xsd),
             'summary': {
-                'total_actions': len(self.actions),
-                'mapped': sum(1 for a in self.actions if a.action == 'mapped'),
-                'added_defaults': sum(1 for a in self.actions if a.action == 'default'),
-                'not_mapped': sum(1 for a in self.actions if a.action == 'removed'),
-                'transformed': sum(1 for a in self.actions if a.action == 'transformed')
+                'total_actions': sum(self.action_counts.values()),
+                'mapped': self.action_counts['mapped'],
+                'added_defaults': self.action_counts['default'],
+                'not_mapped': self.action_counts['removed'],
+                'transformed': self.action_counts['transformed']
             },
             'validation_errors': validation_errors,
-            'actions': [asdict(a) for a in self.actions[:100]]  # Limit for report
+            # Limit for report
+            'actions': [{
+                'action': a.action,
+                'source_path': a.source_path,
+                'target_path': a.target_path,
+                'source_value': a.source_value,
+                'target_value': a.target_value,
+                'notes': a.notes,
+            } for a in self.actions[:100]]
         }
     
+    def _stream_extract_data(self, source_xml: str) -> Dict[str, str]:
+        """Extract all data from source XML in a single iterparse pass.
+        
+        Produces the same mapping, in the same order, as _extract_data but
+        clears each element once read so memory stays flat on large files.
+        """
+        data = {}
+        path_stack = []
+        
+        for event, element in ET.iterparse(source_xml, events=('start', 'end')):
+            if event == 'start':
+                tag = element.tag
+                if '}' in tag:
+                    tag = tag.split('}')[1]
+                
+                parent_path = path_stack[-1] if path_stack else ''
+                current_path = f"{parent_path}/{tag}" if parent_path else tag
+                path_stack.append(current_path)
+                
+                # Reserve the text slot so it precedes attributes and children
+                if current_path not in data:
+                    data[current_path] = None
+                
+                # Store attributes
+                for attr, value in element.attrib.items():
+                    attr_name = attr.split('}')[-1] if '}' in attr else attr
+                    data[f"{current_path}/@{attr_name}"] = value
+            else:
+                current_path = path_stack.pop()
+                
+                # Store text content
+                if element.text and element.text.strip():
+                    data[current_path] = element.text.strip()
+                elif data.get(current_path, '') is None:
+                    del data[current_path]
+                
+                element.clear()
+        
+        return data
+    
     def _extract_data(self, element, parent_path: str, ns: str) -> Dict[str, str]:
-        """Extract all data from source XML"""
+        """Extract all data from source XML (recursive; see --legacy)"""
         data = {}
         
         # Get element name without namespace
@@ -284,30 +491,37 @@ class XMLTransformer:
         """Build target XML structure"""
         
         # Find root element in target schema
-        target_paths = sorted(self.target_schema.get_all_paths(), key=len)
-        if not target_paths:
+        roots = self.target_schema.children.get('', [])
+        if not roots:
             return None
         
-        root_path = target_paths[0]
+        root_path = roots[0]
         root_name = self.target_schema.elements[root_path]['name']
         
-        # Create root element - register namespace to avoid duplication
-        if target_ns:
-            ET.register_namespace('', target_ns)
-            root = ET.Element(f'{{{target_ns}}}{root_name}')
-        else:
-            root = ET.Element(root_name)
+        # Qualified tags are built once per element name, not per element
+        ns_prefix = f'{{{target_ns}}}' if target_ns else ''
+        tags: Dict[str, str] = {}
         
-        # Build element tree
+        def qualified(name: str) -> str:
+            tag = tags.get(name)
+            if tag is None:
+                tag = tags[name] = sys.intern(ns_prefix + name)
+            return tag
+        
+        # Create root element
+        root = ET.Element(qualified(root_name))
+        
+        # Build element tree breadth-first so every parent exists before its children
+        children = self.target_schema.children
+        parent_of = self.target_schema.parent_path
         created_elements = {root_path: root}
+        queue = deque(children.get(root_path, []))
         
-        for target_path in sorted(target_paths, key=len):
-            if target_path == root_path:
-                continue
+        while queue:
+            target_path = queue.popleft()
             
             # Find parent
-            parent_path = '/'.join(target_path.split('/')[:-1])
-            parent_elem = created_elements.get(parent_path)
+            parent_elem = created_elements.get(parent_of[target_path])
             
             if parent_elem is None:
                 continue
@@ -335,65 +549,65 @@ class XMLTransformer:
             
             if value is not None or is_mandatory:
                 # Create element
-                if target_ns:
-                    elem = ET.SubElement(parent_elem, f'{{{target_ns}}}{elem_name}')
-                else:
-                    elem = ET.SubElement(parent_elem, elem_name)
+                elem = ET.SubElement(parent_elem, qualified(elem_name))
                 
                 created_elements[target_path] = elem
+                queue.extend(children.get(target_path, ()))
                 
                 if value is not None:
                     elem.text = value
-                    self.actions.append(TransformAction(
-                        action='mapped',
+                    self._add_action(
+                        'mapped',
                         source_path=source_path,
                         target_path=target_path,
                         source_value=value,
                         target_value=value
-                    ))
+                    )
                 elif is_mandatory and add_defaults:
                     # Add default value for mandatory fields
                     default_value = self._get_default_value(elem_name)
                     if default_value and not list(elem):  # Only if no children
                         elem.text = default_value
-                        self.actions.append(TransformAction(
-                            action='default',
+                        self._add_action(
+                            'default',
                             source_path=None,
                             target_path=target_path,
                             source_value=None,
                             target_value=default_value,
                             notes='Default value added for mandatory field'
-                        ))
+                        )
         
         # Track unmapped source fields
         for source_path, value in source_data.items():
             if '@' in source_path:  # Skip attributes for now
                 continue
-            mapped = any(sp == source_path for sp in self.field_mappings.keys())
-            if not mapped and source_path not in self.target_schema.elements:
-                self.actions.append(TransformAction(
-                    action='removed',
+            if (source_path not in self.field_mappings
+                    and source_path not in self.target_schema.elements):
+                self._add_action(
+                    'removed',
                     source_path=source_path,
                     target_path='',
                     source_value=value,
                     target_value=None,
                     notes='No matching field in target schema'
-                ))
+                )
         
         return root
     
+    def _add_action(self, action: str, source_path: Optional[str], target_path: str,
+                    source_value: Optional[str], target_value: Optional[str],
+                    notes: Optional[str] = None):
+        """Count an action and keep its details up to the per-kind cap"""
+        count = self.action_counts[action]
+        self.action_counts[action] = count + 1
+        if count < self.MAX_ACTIONS_PER_KIND:
+            self.actions.append(TransformAction(
+                action, source_path, target_path, source_value, target_value, notes
+            ))
+    
     def _get_default_value(self, elem_name: str) -> Optional[str]:
         """Get default value for element"""
-        defaults = {
-            'MsgId': f'MSG{datetime.now().strftime("%Y%m%d%H%M%S")}',
-            'CreDtTm': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
-            'NbOfTxs': '1',
-            'IntrBkSttlmDt': datetime.now().strftime('%Y-%m-%d'),
-            'ChrgBr': 'SLEV',
-            'Ccy': 'EUR',
-            'Ctry': 'DE',
-        }
-        return defaults.get(elem_name)
+        return self._defaults.get(elem_name)
     
     def _validate_output(self, xml_file: str) -> List[str]:
         """Validate output against target schema"""
@@ -591,6 +805,9 @@ Examples:
   
   # Transform without adding defaults
   python xml_transformer.py input.xml old.xsd new.xsd -o output.xml --no-defaults
+  
+  # Ignore cached schema analysis (~/.cache/xsdbank)
+  python xml_transformer.py input.xml old.xsd new.xsd -o output.xml --no-cache
         """
     )
     
@@ -602,6 +819,10 @@ Examples:
     parser.add_argument('--no-defaults', action='store_true', 
                         help='Do not add default values for mandatory fields')
     parser.add_argument('--json', action='store_true', help='Output result as JSON')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Use the recursive in-memory extractor (debugging only)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-parse schemas instead of using the on-disk schema cache')
     
     args = parser.parse_args()
     
@@ -622,7 +843,8 @@ Examples:
     print(f"📄 Output:     {args.output}")
     
     print(f"\n⏳ Analyzing schemas...")
-    transformer = XMLTransformer(args.source_xsd, args.target_xsd)
+    transformer = XMLTransformer(args.source_xsd, args.target_xsd,
+                                 use_cache=not args.no_cache)
     
     print(f"   Found {len(transformer.field_mappings)} automatic field mappings")
     
@@ -630,7 +852,8 @@ Examples:
     result = transformer.transform(
         args.source_xml, 
         args.output,
-        add_defaults=not args.no_defaults
+        add_defaults=not args.no_defaults,
+        legacy=args.legacy
     )
     
     if args.json:
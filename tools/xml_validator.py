@@ -30,23 +30,88 @@ Validates XML messages against XSD schemas with comprehensive rule checking:
 """
 
 import xml.etree.ElementTree as ET
+import xml.sax
+from xml.sax.handler import ContentHandler, feature_external_ges, feature_namespaces
 import re
 import json
 import zipfile
 import os
+import glob
+import functools
 from datetime import datetime
 from pathlib import Path
 import argparse
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from enum import Enum
 
 try:
     from lxml import etree as lxml_etree
     HAS_LXML = True
+    
+    # Instance documents: no ID table, no entity expansion, no blank text,
+    # comment or PI nodes (so every child node is an element). They are
+    # untrusted input, so libxml2's text-size and depth limits stay on
+    # (no huge_tree); document size itself is not limited
+    _PARSER = lxml_etree.XMLParser(collect_ids=False, resolve_entities=False,
+                                   remove_blank_text=True,
+                                   remove_comments=True, remove_pis=True)
 except ImportError:
     HAS_LXML = False
 
+# Errors that mean the document could not be read or parsed; anything else
+# raised during validation is a bug and propagates
+_PARSE_ERRORS = (ET.ParseError, xml.sax.SAXParseException, OSError)
+if HAS_LXML:
+    _PARSE_ERRORS += (lxml_etree.XMLSyntaxError,)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+_UUID_CHARS = frozenset('0123456789abcdef-')
+
+# ISO 4217 active currency codes (including fund and precious-metal codes)
+VALID_CCYS = frozenset("""
+    AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB
+    BOV BRL BSD BTN BWP BYN BZD CAD CDF CHE CHF CHW CLF CLP CNY COP COU CRC CUC
+    CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GNF
+    GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF
+    KPW KRW KWD KYD KZT LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU
+    MUR MVR MWK MXN MXV MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR
+    PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SLL SOS SRD SSP
+    STN SVC SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX USD USN UYI UYU
+    UYW UZS VED VES VND VUV WST XAF XAG XAU XBA XBB XBC XBD XCD XCG XDR XOF XPD
+    XPF XPT XSU XTS XUA XXX YER ZAR ZMW ZWG ZWL
+""".split())
+
+# ISO 3166-1 alpha-2 country codes, plus XK (Kosovo) as used in payments
+VALID_CTRY = frozenset("""
+    AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ BA BB BD BE BF BG BH BI BJ
+    BL BM BN BO BQ BR BS BT BV BW BY BZ CA CC CD CF CG CH CI CK CL CM CN CO CR
+    CU CV CW CX CY CZ DE DJ DK DM DO DZ EC EE EG EH ER ES ET FI FJ FK FM FO FR
+    GA GB GD GE GF GG GH GI GL GM GN GP GQ GR GS GT GU GW GY HK HM HN HR HT HU
+    ID IE IL IM IN IO IQ IR IS IT JE JM JO JP KE KG KH KI KM KN KP KR KW KY KZ
+    LA LB LC LI LK LR LS LT LU LV LY MA MC MD ME MF MG MH MK ML MM MN MO MP MQ
+    MR MS MT MU MV MW MX MY MZ NA NC NE NF NG NI NL NO NP NR NU NZ OM PA PE PF
+    PG PH PK PL PM PN PR PS PT PW PY QA RE RO RS RU RW SA SB SC SD SE SG SH SI
+    SJ SK SL SM SN SO SR SS ST SV SX SY SZ TC TD TF TG TH TJ TK TL TM TN TO TR
+    TT TV TW TZ UA UG UM US UY UZ VA VC VE VG VI VN VU WF WS YE YT ZA ZM ZW XK
+""".split())
+
+
+@functools.lru_cache(maxsize=32)
+def _load_schema(path: str, mtime: float):
+    """Compiled XSD, shared across validator instances until the file changes"""
+    with open(path, 'rb') as f:
+        return lxml_etree.XMLSchema(lxml_etree.parse(f))
+
 
 class Severity(Enum):
     ERROR = "ERROR"
@@ -54,7 +119,7 @@ class Severity(Enum):
     INFO = "INFO"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationIssue:
     severity: str
     category: str
@@ -65,84 +130,206 @@ class ValidationIssue:
     value: Optional[str] = None
     expected: Optional[str] = None
     suggestion: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict for the JSON report (all fields are scalars)"""
+        return {
+            'severity': self.severity,
+            'category': self.category,
+            'path': self.path,
+            'element': self.element,
+            'message': self.message,
+            'line': self.line,
+            'value': self.value,
+            'expected': self.expected,
+            'suggestion': self.suggestion,
+        }
+
+
+class _SAXEventHandler(ContentHandler):
+    """Turn SAX callbacks into (event, element) pairs shaped like iterparse output
+    
+    Only parents named in keep_children hold on to their child elements (the
+    either/or rules look at them); everything else is detached as soon as it
+    is built, so memory stays flat however large the document is.
+    """
+    
+    def __init__(self, keep_children):
+        super().__init__()
+        self.keep_children = keep_children
+        self.events: List[Tuple[str, ET.Element]] = []
+        # [element, keep its children, text chunks or None once a child started]
+        self._stack: List[list] = []
+    
+    def startElementNS(self, name, qname, attrs):
+        uri, local_name = name
+        elem = ET.Element(f"{{{uri}}}{local_name}" if uri else local_name,
+                          {k[1]: v for k, v in attrs.items() if not k[0]})
+        if self._stack:
+            entry = self._stack[-1]
+            parent, keep, text = entry
+            if keep:
+                parent.append(elem)
+            if text is not None:
+                # Like ElementTree's .text, only text before the first child
+                # counts; later text between children is not buffered
+                if text:
+                    parent.text = ''.join(text)
+                entry[2] = None
+        self._stack.append([elem, local_name in self.keep_children, []])
+        self.events.append(('start', elem))
+    
+    def characters(self, content):
+        text = self._stack[-1][2]
+        if text is not None:
+            text.append(content)
+    
+    def endElementNS(self, name, qname):
+        elem, _, text = self._stack.pop()
+        if text:
+            elem.text = ''.join(text)
+        self.events.append(('end', elem))
 
 
 class ISO20022XMLValidator:
     """Comprehensive XML validator for ISO 20022 messages"""
     
+    # ISO 20022 Either/Or Rules
+    either_or_rules = {
+        'RmtInf': {
+            'elements': ['Ustrd', 'Strd'],
+            'rule': "Either 'Unstructured' or 'Structured' may be present, not both",
+            'max_allowed': 1
+        },
+        'FinInstnId': {
+            'elements': ['BICFI', 'LEI'],
+            'rule': "Either 'BICFI' or 'LEI' is allowed for identification",
+            'max_allowed': 1
+        },
+        'OrgId': {
+            'elements': ['AnyBIC', 'LEI', 'Othr'],
+            'rule': "Either 'AnyBIC', 'LEI' or 'Other' is allowed",
+            'max_allowed': 1
+        },
+        'PrvtId': {
+            'elements': ['DtAndPlcOfBirth', 'Othr'],
+            'rule': "Either 'Date and Place of Birth' or 'Other' is allowed",
+            'max_allowed': 1
+        }
+    }
+    
+    # Format patterns
+    format_patterns = {
+        'IBAN': r'^[A-Z]{2}[0-9]{2}[A-Z0-9]{4,30}$',
+        'BIC': r'^[A-Z]{6}[A-Z2-9][A-NP-Z0-9]([A-Z0-9]{3})?$',
+        'LEI': r'^[A-Z0-9]{18}[0-9]{2}$',
+        'CountryCode': r'^[A-Z]{2}$',
+        'CurrencyCode': r'^[A-Z]{3}$',
+        'ISODate': r'^\d{4}-\d{2}-\d{2}$',
+        'ISODateTime': r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}',
+        'UUID': r'^[a-f0-9]{8}-[a-f0-9]{4}-4[a-f0-9]{3}-[89ab][a-f0-9]{3}-[a-f0-9]{12}$'
+    }
+    _compiled_formats = {k: re.compile(v) for k, v in format_patterns.items()}
+    
+    # Formats checked against a code list; a rejected value may still match its pattern
+    format_expected = {
+        'CountryCode': 'known ISO 3166-1 alpha-2 code',
+        'CurrencyCode': 'known ISO 4217 code',
+    }
+    
+    # Element to format mapping
+    element_formats = {
+        'IBAN': 'IBAN',
+        'BICFI': 'BIC',
+        'BIC': 'BIC',
+        'AnyBIC': 'BIC',
+        'LEI': 'LEI',
+        'Ctry': 'CountryCode',
+        'CtryOfBirth': 'CountryCode',
+        'CtryOfRes': 'CountryCode',
+        'Ccy': 'CurrencyCode',
+        'CreDtTm': 'ISODateTime',
+        'AccptncDtTm': 'ISODateTime',
+        'IntrBkSttlmDt': 'ISODate',
+        'ReqdExctnDt': 'ISODate',
+        'UETR': 'UUID'
+    }
+    
+    # Amount elements
+    amount_elements = ['Amt', 'IntrBkSttlmAmt', 'TtlIntrBkSttlmAmt', 'InstdAmt', 'EqvtAmt']
+    
+    # Elements that should appear only once
+    single_occurrence = frozenset(['MsgId', 'CreDtTm', 'NbOfTxs', 'TtlIntrBkSttlmAmt', 'IntrBkSttlmDt'])
+    
     def __init__(self, xsd_file: str):
         self.xsd_file = xsd_file
         self.issues: List[ValidationIssue] = []
-        self.xml_tree = None
         self.xml_root = None
         self.namespaces = {}
         
-        # ISO 20022 Either/Or Rules
-        self.either_or_rules = {
-            'RmtInf': {
-                'elements': ['Ustrd', 'Strd'],
-                'rule': "Either 'Unstructured' or 'Structured' may be present, not both",
-                'max_allowed': 1
-            },
-            'FinInstnId': {
-                'elements': ['BICFI', 'LEI'],
-                'rule': "Either 'BICFI' or 'LEI' is allowed for identification",
-                'max_allowed': 1
-            },
-            'OrgId': {
-                'elements': ['AnyBIC', 'LEI', 'Othr'],
-                'rule': "Either 'AnyBIC', 'LEI' or 'Other' is allowed",
-                'max_allowed': 1
-            },
-            'PrvtId': {
-                'elements': ['DtAndPlcOfBirth', 'Othr'],
-                'rule': "Either 'Date and Place of Birth' or 'Other' is allowed",
-                'max_allowed': 1
-            }
-        }
+        # Qualified tag -> local name, filled as tags are first seen
+        self._local_names: Dict[str, str] = {}
         
-        # Format patterns
-        self.format_patterns = {
-            'IBAN': r'^[A-Z]{2}[0-9]{2}[A-Z0-9]{4,30}$',
-            'BIC': r'^[A-Z]{6}[A-Z2-9][A-NP-Z0-9]([A-Z0-9]{3})?$',
-            'LEI': r'^[A-Z0-9]{18}[0-9]{2}$',
-            'CountryCode': r'^[A-Z]{2}$',
-            'CurrencyCode': r'^[A-Z]{3}$',
-            'ISODate': r'^\d{4}-\d{2}-\d{2}$',
-            'ISODateTime': r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}',
-            'UUID': r'^[a-f0-9]{8}-[a-f0-9]{4}-4[a-f0-9]{3}-[89ab][a-f0-9]{3}-[a-f0-9]{12}$'
-        }
+        # '{namespace}' of the current document, set from its root
+        self._ns_prefix = ''
         
-        # Element to format mapping
-        self.element_formats = {
-            'IBAN': 'IBAN',
-            'BICFI': 'BIC',
-            'BIC': 'BIC',
-            'AnyBIC': 'BIC',
-            'LEI': 'LEI',
-            'Ctry': 'CountryCode',
-            'CtryOfBirth': 'CountryCode',
-            'CtryOfRes': 'CountryCode',
-            'Ccy': 'CurrencyCode',
-            'CreDtTm': 'ISODateTime',
-            'AccptncDtTm': 'ISODateTime',
-            'IntrBkSttlmDt': 'ISODate',
-            'ReqdExctnDt': 'ISODate',
-            'UETR': 'UUID'
+        # Fixed-shape identifiers are checked without the regex engine
+        self._format_checkers = {
+            'IBAN': self._is_iban,
+            'BIC': self._is_bic,
+            'LEI': self._is_lei,
+            'CountryCode': self._is_country,
+            'CurrencyCode': self._is_ccy,
+            'ISODate': self._is_iso_date,
+            'ISODateTime': self._is_iso_datetime,
+            'UUID': self._is_uuid4,
         }
+        
+        # Local name -> rule checks run when that element closes
+        self._dispatch: Dict[str, List[Callable]] = defaultdict(list)
+        for name in self.either_or_rules:
+            self._dispatch[name].append(self._check_either_or)
+        for name in self.element_formats:
+            self._dispatch[name].append(self._check_format)
+        for name in self.amount_elements:
+            self._dispatch[name].append(self._check_amount)
     
-    def validate(self, xml_file: str) -> Dict:
-        """Run all validations on XML file"""
-        self.issues = []
+    def validate(self, xml_file: str, rules_only: bool = False, stream: bool = False) -> Dict:
+        """Run all validations on XML file
         
-        # Parse XML
-        if not self._parse_xml(xml_file):
-            return self._generate_report()
+        rules_only skips XSD validation; stream additionally runs the rule
+        checks through SAX in constant memory (for multi-GB batch files).
+        """
+        self.reset()
         
-        # XSD Schema Validation (if lxml available)
-        if HAS_LXML:
-            self._validate_xsd(xml_file)
-        else:
+        if stream:
+            self._validate_rules(self._sax_events(xml_file))
+        elif rules_only:
+            # Without the XSD pass no tree is needed, so stream the rule checks
+            if HAS_LXML:
+                events = lxml_etree.iterparse(xml_file, events=('start', 'end'),
+                                              resolve_entities=False,
+                                              remove_blank_text=True, remove_comments=True,
+                                              remove_pis=True)
+            else:
+                events = ET.iterparse(xml_file, events=('start', 'end'))
+            self._validate_rules(events)
+        elif HAS_LXML:
+            # Parse once: the same tree feeds XSD validation and the rule pass
+            try:
+                doc = lxml_etree.parse(xml_file, _PARSER)
+            except _PARSE_ERRORS as e:
+                self._add_parse_error(e)
+                return self._generate_report()
+            
+            # XSD Schema Validation
+            self._validate_xsd(doc)
+            
+            # Business rules, formats, amounts and cardinality in a single pass.
+            # The walk clears elements as it goes, so the tree is not kept on
+            # the validator (a batch worker would otherwise pin the last file)
+            self._validate_rules(lxml_etree.iterwalk(doc, events=('start', 'end')))
+        elif self._validate_rules(ET.iterparse(xml_file, events=('start', 'end'))):
             self.issues.append(ValidationIssue(
                 severity=Severity.WARNING.value,
                 category="Setup",
@@ -152,33 +339,32 @@ class ISO20022XMLValidator:
                 suggestion="pip install lxml"
             ))
         
-        # Business Rules Validation
-        self._validate_either_or_rules()
-        
-        # Format Validation
-        self._validate_formats()
-        
-        # Amount Validation
-        self._validate_amounts()
-        
-        # Cardinality Validation
-        self._validate_cardinality()
-        
         return self._generate_report()
     
-    def _parse_xml(self, xml_file: str) -> bool:
-        """Parse XML file and extract namespaces"""
-        try:
-            self.xml_tree = ET.parse(xml_file)
-            self.xml_root = self.xml_tree.getroot()
-            
-            # Extract namespace
-            if self.xml_root.tag.startswith('{'):
-                ns_end = self.xml_root.tag.index('}')
-                self.namespaces['ns'] = self.xml_root.tag[1:ns_end]
-            
-            return True
-        except ET.ParseError as e:
+    def reset(self):
+        """Clear per-document state so one instance can validate many files"""
+        self.issues = []
+        self.xml_root = None
+    
+    def _sax_events(self, xml_file: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, ET.Element]]:
+        """Feed the file to a SAX parser in chunks, yielding iterparse-style events"""
+        handler = _SAXEventHandler(self.either_or_rules)
+        parser = xml.sax.make_parser()
+        parser.setFeature(feature_namespaces, True)
+        parser.setFeature(feature_external_ges, False)
+        parser.setContentHandler(handler)
+        
+        with open(xml_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                parser.feed(chunk)
+                yield from handler.events
+                handler.events.clear()
+        parser.close()
+        yield from handler.events
+    
+    def _add_parse_error(self, e: Exception):
+        """Record an XML parsing failure"""
+        if isinstance(e, SyntaxError):
             self.issues.append(ValidationIssue(
                 severity=Severity.ERROR.value,
                 category="XML Parsing",
@@ -187,8 +373,16 @@ class ISO20022XMLValidator:
                 message=f"XML parsing error: {str(e)}",
                 line=getattr(e, 'position', (None,))[0]
             ))
-            return False
-        except Exception as e:
+        elif isinstance(e, xml.sax.SAXParseException):
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="XML Parsing",
+                path="",
+                element="Document",
+                message=f"XML parsing error: {str(e)}",
+                line=e.getLineNumber()
+            ))
+        else:
             self.issues.append(ValidationIssue(
                 severity=Severity.ERROR.value,
                 category="XML Parsing",
@@ -196,19 +390,62 @@ class ISO20022XMLValidator:
                 element="Document",
                 message=f"Failed to parse XML: {str(e)}"
             ))
+    
+    def _validate_rules(self, events) -> bool:
+        """Walk (event, element) pairs once, dispatching each element to its rule checks"""
+        counts = Counter()
+        path_stack: List[str] = []
+        local_names = self._local_names
+        
+        try:
+            for event, elem in events:
+                if event == 'start':
+                    if self.xml_root is None:
+                        self._set_root(elem)
+                    local_name = local_names.get(elem.tag)
+                    if local_name is None:
+                        local_name = self._local_name(elem.tag)
+                    path_stack.append(local_name)
+                    continue
+                
+                local_name = path_stack[-1]
+                
+                if local_name in self.single_occurrence:
+                    counts[local_name] += 1
+                checks = self._dispatch.get(local_name)
+                if checks:
+                    path = '/'.join(path_stack)
+                    for check in checks:
+                        check(elem, local_name, path)
+                
+                path_stack.pop()
+                
+                # Children have been checked; only open ancestors stay in memory
+                elem.clear()
+        except _PARSE_ERRORS as e:
+            self._add_parse_error(e)
             return False
+        
+        self._check_cardinality(counts)
+        return True
     
-    def _validate_xsd(self, xml_file: str):
-        """Validate XML against XSD schema using lxml"""
+    def _set_root(self, root):
+        """Record the document root and extract its namespace"""
+        self.xml_root = root
+        ns_prefix = ''
+        if root.tag.startswith('{'):
+            ns_end = root.tag.index('}')
+            self.namespaces['ns'] = root.tag[1:ns_end]
+            ns_prefix = root.tag[:ns_end + 1]
+        
+        # ISO 20022 messages use a single namespace, so local names are
+        # normally just this prefix sliced off
+        self._ns_prefix = ns_prefix
+    
+    def _validate_xsd(self, xml_doc):
+        """Validate a parsed XML document against the XSD schema using lxml"""
         try:
-            # Parse XSD
-            with open(self.xsd_file, 'rb') as f:
-                schema_doc = lxml_etree.parse(f)
-            schema = lxml_etree.XMLSchema(schema_doc)
-            
-            # Parse and validate XML
-            with open(xml_file, 'rb') as f:
-                xml_doc = lxml_etree.parse(f)
+            schema = _load_schema(self.xsd_file, os.path.getmtime(self.xsd_file))
             
             if not schema.validate(xml_doc):
                 for error in schema.error_log:
@@ -249,210 +486,244 @@ class ISO20022XMLValidator:
                 message=f"XSD validation error: {str(e)}"
             ))
     
-    def _validate_either_or_rules(self):
+    def _check_either_or(self, parent_elem, parent_name: str, path: str):
         """Validate ISO 20022 either/or business rules"""
+        rule = self.either_or_rules[parent_name]
         
-        for parent_name, rule in self.either_or_rules.items():
-            # Find all instances of the parent element
-            parent_elements = self._find_elements_by_local_name(parent_name)
-            
-            for parent_elem in parent_elements:
-                found_elements = []
+        # A parent with no more children than allowed cannot break the rule
+        if len(parent_elem) <= rule['max_allowed']:
+            return
+        
+        # One pass over the children, then keep the rule's own element order
+        local_name = self._local_name
+        child_names = {local_name(child.tag) for child in parent_elem}
+        if len(child_names) <= rule['max_allowed']:
+            return
+        found_elements = [name for name in rule['elements'] if name in child_names]
+        
+        # Check if more than one either/or element is present
+        if len(found_elements) > rule['max_allowed']:
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="Business Rule",
+                path=path,
+                element=parent_name,
+                message=f"Multiple mutually exclusive elements found: {', '.join(found_elements)}",
+                expected=f"Only one of: {', '.join(rule['elements'])}",
+                suggestion=f"Remove one of: {', '.join(found_elements)}. {rule['rule']}"
+            ))
+    
+    def _check_format(self, elem, elem_name: str, path: str):
+        """Validate element formats (IBAN, BIC, dates, etc.)"""
+        value = elem.text
+        if value:
+            format_type = self.element_formats[elem_name]
+            candidate = value.strip() if value[0].isspace() or value[-1].isspace() else value
+            checker = self._format_checkers.get(format_type)
+            if checker is not None:
+                valid = checker(candidate)
+            else:
+                compiled = self._compiled_formats.get(format_type)
+                valid = compiled is None or compiled.match(candidate)
+            if not valid:
+                # Code lists are checked against the known set, not the pattern
+                expected = self.format_expected.get(format_type)
+                if expected is None:
+                    expected = f"Pattern: {self.format_patterns[format_type]}"
                 
-                for child_name in rule['elements']:
-                    children = self._find_children_by_local_name(parent_elem, child_name)
-                    if children:
-                        found_elements.append(child_name)
+                # Generate specific suggestion based on format type
+                suggestion = self._get_format_suggestion(format_type, value)
                 
-                # Check if more than one either/or element is present
-                if len(found_elements) > rule['max_allowed']:
-                    path = self._get_element_path(parent_elem)
-                    self.issues.append(ValidationIssue(
-                        severity=Severity.ERROR.value,
-                        category="Business Rule",
-                        path=path,
-                        element=parent_name,
-                        message=f"Multiple mutually exclusive elements found: {', '.join(found_elements)}",
-                        expected=f"Only one of: {', '.join(rule['elements'])}",
-                        suggestion=f"Remove one of: {', '.join(found_elements)}. {rule['rule']}"
-                    ))
+                self.issues.append(ValidationIssue(
+                    severity=Severity.ERROR.value,
+                    category="Format Validation",
+                    path=path,
+                    element=elem_name,
+                    message=f"Invalid {format_type} format",
+                    value=value,
+                    expected=expected,
+                    suggestion=suggestion
+                ))
     
-    def _validate_formats(self):
-        """Validate element formats (IBAN, BIC, dates, etc.)"""
-        
-        for elem_name, format_type in self.element_formats.items():
-            elements = self._find_elements_by_local_name(elem_name)
-            
-            for elem in elements:
-                value = elem.text
-                if value:
-                    pattern = self.format_patterns.get(format_type)
-                    if pattern and not re.match(pattern, value.strip()):
-                        path = self._get_element_path(elem)
-                        
-                        # Generate specific suggestion based on format type
-                        suggestion = self._get_format_suggestion(format_type, value)
-                        
-                        self.issues.append(ValidationIssue(
-                            severity=Severity.ERROR.value,
-                            category="Format Validation",
-                            path=path,
-                            element=elem_name,
-                            message=f"Invalid {format_type} format",
-                            value=value,
-                            expected=f"Pattern: {pattern}",
-                            suggestion=suggestion
-                        ))
-    
-    def _validate_amounts(self):
+    @staticmethod
+    def _is_upper_alpha(s: str) -> bool:
+        return s.isascii() and s.isalpha() and s.isupper()
+    
+    @staticmethod
+    def _is_upper_alnum(s: str) -> bool:
+        return s.isascii() and s.isalnum() and s.upper() == s
+    
+    @staticmethod
+    def _is_digits(s: str) -> bool:
+        return s.isascii() and s.isdigit()
+    
+    @classmethod
+    def _is_iban(cls, s: str) -> bool:
+        """[A-Z]{2}[0-9]{2}[A-Z0-9]{4,30}"""
+        return (8 <= len(s) <= 34 and cls._is_upper_alpha(s[:2])
+                and cls._is_digits(s[2:4]) and cls._is_upper_alnum(s[4:]))
+    
+    @classmethod
+    def _is_bic(cls, s: str) -> bool:
+        """[A-Z]{6}[A-Z2-9][A-NP-Z0-9]([A-Z0-9]{3})?"""
+        return ((len(s) == 8 or len(s) == 11) and cls._is_upper_alpha(s[:6])
+                and s[6] in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ23456789'
+                and s[7] in 'ABCDEFGHIJKLMNPQRSTUVWXYZ0123456789'
+                and (len(s) == 8 or cls._is_upper_alnum(s[8:])))
+    
+    @classmethod
+    def _is_lei(cls, s: str) -> bool:
+        """[A-Z0-9]{18}[0-9]{2}"""
+        return len(s) == 20 and cls._is_upper_alnum(s[:18]) and cls._is_digits(s[18:])
+    
+    @staticmethod
+    def _is_country(s: str) -> bool:
+        """Known ISO 3166 alpha-2 code (stricter than [A-Z]{2})"""
+        return s in VALID_CTRY
+    
+    @staticmethod
+    def _is_ccy(s: str) -> bool:
+        """Known ISO 4217 code (stricter than [A-Z]{3})"""
+        return s in VALID_CCYS
+    
+    @staticmethod
+    def _is_iso_date(s: str) -> bool:
+        """YYYY-MM-DD"""
+        return (len(s) == 10 and s[4] == '-' and s[7] == '-'
+                and s[:4].isdecimal() and s[5:7].isdecimal() and s[8:].isdecimal())
+    
+    @classmethod
+    def _is_iso_datetime(cls, s: str) -> bool:
+        """YYYY-MM-DDThh:mm:ss, optionally followed by fraction/zone"""
+        return (len(s) >= 19 and cls._is_iso_date(s[:10]) and s[10] == 'T'
+                and s[13] == ':' and s[16] == ':'
+                and s[11:13].isdecimal() and s[14:16].isdecimal() and s[17:19].isdecimal())
+    
+    @staticmethod
+    def _is_uuid4(s: str) -> bool:
+        """Lowercase UUID v4: version nibble 4, variant 8/9/a/b"""
+        return (len(s) == 36 and s[8] == '-' and s[13] == '-' and s[18] == '-' and s[23] == '-'
+                and s[14] == '4' and s[19] in '89ab'
+                and s.count('-') == 4 and _UUID_CHARS.issuperset(s))
+    
+    def _check_amount(self, elem, amt_name: str, path: str):
         """Validate amount fields"""
+        value = elem.text
         
-        amount_elements = ['Amt', 'IntrBkSttlmAmt', 'TtlIntrBkSttlmAmt', 'InstdAmt', 'EqvtAmt']
+        # Check if amount has a value
+        if not value or value.isspace():
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="Amount Validation",
+                path=path,
+                element=amt_name,
+                message="Amount element is empty",
+                suggestion="Provide a numeric value (e.g., 1234.56)"
+            ))
+            return
         
-        for amt_name in amount_elements:
-            elements = self._find_elements_by_local_name(amt_name)
+        # Plain ASCII digits with at most two decimals are by far the common
+        # case and need none of the numeric checks below
+        int_part, dot, frac = value.partition('.')
+        if (value.isascii() and int_part.isdigit() and len(frac) <= 2
+                and (not dot or frac.isdigit())):
+            self._check_amount_ccy(elem, amt_name, path)
+            return
+        
+        # Check if amount is valid number
+        try:
+            amount = float(value)
             
-            for elem in elements:
-                value = elem.text
-                path = self._get_element_path(elem)
-                
-                # Check if amount has a value
-                if not value or not value.strip():
-                    self.issues.append(ValidationIssue(
-                        severity=Severity.ERROR.value,
-                        category="Amount Validation",
-                        path=path,
-                        element=amt_name,
-                        message="Amount element is empty",
-                        suggestion="Provide a numeric value (e.g., 1234.56)"
-                    ))
-                    continue
-                
-                # Check if amount is valid number
-                try:
-                    amount = float(value)
-                    
-                    # Check for negative amounts
-                    if amount < 0:
-                        self.issues.append(ValidationIssue(
-                            severity=Severity.ERROR.value,
-                            category="Amount Validation",
-                            path=path,
-                            element=amt_name,
-                            message="Amount cannot be negative",
-                            value=value,
-                            suggestion="Use a positive amount value"
-                        ))
-                    
-                    # Check decimal places (max 2 for most currencies)
-                    if '.' in value:
-                        decimals = len(value.split('.')[1])
-                        if decimals > 2:
-                            self.issues.append(ValidationIssue(
-                                severity=Severity.WARNING.value,
-                                category="Amount Validation",
-                                path=path,
-                                element=amt_name,
-                                message=f"Amount has {decimals} decimal places (max 2 recommended)",
-                                value=value,
-                                suggestion="Round to 2 decimal places"
-                            ))
-                
-                except ValueError:
+            # Check for negative amounts
+            if amount < 0:
+                self.issues.append(ValidationIssue(
+                    severity=Severity.ERROR.value,
+                    category="Amount Validation",
+                    path=path,
+                    element=amt_name,
+                    message="Amount cannot be negative",
+                    value=value,
+                    suggestion="Use a positive amount value"
+                ))
+            
+            # Check decimal places (max 2 for most currencies)
+            dot = value.rfind('.')
+            if dot >= 0:
+                decimals = len(value) - dot - 1
+                if decimals > 2:
                     self.issues.append(ValidationIssue(
-                        severity=Severity.ERROR.value,
+                        severity=Severity.WARNING.value,
                         category="Amount Validation",
                         path=path,
                         element=amt_name,
-                        message="Amount is not a valid number",
+                        message=f"Amount has {decimals} decimal places (max 2 recommended)",
                         value=value,
-                        suggestion="Provide a valid numeric value"
-                    ))
-                
-                # Check for currency attribute
-                ccy = elem.get('Ccy')
-                if not ccy:
-                    self.issues.append(ValidationIssue(
-                        severity=Severity.ERROR.value,
-                        category="Amount Validation",
-                        path=path,
-                        element=amt_name,
-                        message="Missing 'Ccy' (currency) attribute",
-                        suggestion="Add Ccy attribute (e.g., Ccy=\"EUR\")"
-                    ))
-                elif not re.match(r'^[A-Z]{3}$', ccy):
-                    self.issues.append(ValidationIssue(
-                        severity=Severity.ERROR.value,
-                        category="Amount Validation",
-                        path=path,
-                        element=amt_name,
-                        message=f"Invalid currency code: {ccy}",
-                        value=ccy,
-                        expected="3-letter ISO currency code",
-                        suggestion="Use valid ISO 4217 currency code (e.g., EUR, USD, GBP)"
+                        suggestion="Round to 2 decimal places"
                     ))
-    
-    def _validate_cardinality(self):
-        """Validate element cardinality rules"""
         
-        # Elements that should appear only once
-        single_occurrence = ['MsgId', 'CreDtTm', 'NbOfTxs', 'TtlIntrBkSttlmAmt', 'IntrBkSttlmDt']
+        except ValueError:
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="Amount Validation",
+                path=path,
+                element=amt_name,
+                message="Amount is not a valid number",
+                value=value,
+                suggestion="Provide a valid numeric value"
+            ))
         
-        for elem_name in single_occurrence:
-            elements = self._find_elements_by_local_name(elem_name)
-            
-            if len(elements) > 1:
+        self._check_amount_ccy(elem, amt_name, path)
+    
+    def _check_amount_ccy(self, elem, amt_name: str, path: str):
+        """Validate the currency attribute of an amount"""
+        ccy = elem.get('Ccy')
+        if not ccy:
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="Amount Validation",
+                path=path,
+                element=amt_name,
+                message="Missing 'Ccy' (currency) attribute",
+                suggestion="Add Ccy attribute (e.g., Ccy=\"EUR\")"
+            ))
+        elif ccy not in VALID_CCYS:
+            self.issues.append(ValidationIssue(
+                severity=Severity.ERROR.value,
+                category="Amount Validation",
+                path=path,
+                element=amt_name,
+                message=f"Invalid currency code: {ccy}",
+                value=ccy,
+                expected="known ISO 4217 code",
+                suggestion="Use valid ISO 4217 currency code (e.g., EUR, USD, GBP)"
+            ))
+    
+    def _check_cardinality(self, counts: Counter):
+        """Validate element cardinality rules"""
+        # Only names seen in the document were counted
+        for elem_name, count in counts.items():
+            if count > 1:
                 self.issues.append(ValidationIssue(
                     severity=Severity.WARNING.value,
                     category="Cardinality",
                     path="",
                     element=elem_name,
-                    message=f"Element '{elem_name}' appears {len(elements)} times (expected 1)",
+                    message=f"Element '{elem_name}' appears {count} times (expected 1)",
                     suggestion=f"Remove duplicate '{elem_name}' elements"
                 ))
     
-    def _find_elements_by_local_name(self, local_name: str) -> List[ET.Element]:
-        """Find all elements by local name (ignoring namespace)"""
-        results = []
-        
-        def search(elem):
-            tag = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
-            if tag == local_name:
-                results.append(elem)
-            for child in elem:
-                search(child)
-        
-        if self.xml_root is not None:
-            search(self.xml_root)
-        
-        return results
-    
-    def _find_children_by_local_name(self, parent: ET.Element, local_name: str) -> List[ET.Element]:
-        """Find direct children by local name"""
-        results = []
-        for child in parent:
-            tag = child.tag.split('}')[-1] if '}' in child.tag else child.tag
-            if tag == local_name:
-                results.append(child)
-        return results
-    
-    def _get_element_path(self, elem: ET.Element) -> str:
-        """Get XPath-like path to element"""
-        path_parts = []
-        
-        def build_path(element, root):
-            for parent in root.iter():
-                for child in parent:
-                    if child == element:
-                        parent_path = build_path(parent, root)
-                        tag = element.tag.split('}')[-1] if '}' in element.tag else element.tag
-                        return f"{parent_path}/{tag}" if parent_path else tag
-            tag = element.tag.split('}')[-1] if '}' in element.tag else element.tag
-            return tag
-        
-        if self.xml_root is not None:
-            return build_path(elem, self.xml_root)
-        return ""
+    def _local_name(self, tag: str) -> str:
+        """Namespace-free element name, computed once per distinct tag"""
+        local_name = self._local_names.get(tag)
+        if local_name is None:
+            # Document-namespace tags (nearly all of them) are a plain slice
+            prefix = self._ns_prefix
+            if prefix and tag.startswith(prefix):
+                local_name = tag[len(prefix):]
+            else:
+                local_name = tag.split('}')[-1] if '}' in tag else tag
+            self._local_names[tag] = local_name
+        return local_name
     
     def _get_format_suggestion(self, format_type: str, value: str) -> str:
         """Generate specific suggestion based on format type"""
@@ -490,14 +761,70 @@ class ISO20022XMLValidator:
                 'info': info_count
             },
             'by_category': categories,
-            'issues': [asdict(issue) for issue in self.issues]
+            'issues': [issue.to_dict() for issue in self.issues]
         }
 
 
-def validate_xml(xml_file: str, xsd_file: str) -> Dict:
+def validate_xml(xml_file: str, xsd_file: str, rules_only: bool = False,
+                 stream: bool = False) -> Dict:
     """Main validation function"""
     validator = ISO20022XMLValidator(xsd_file)
-    return validator.validate(xml_file)
+    return validator.validate(xml_file, rules_only, stream)
+
+
+_worker_validator: Optional[ISO20022XMLValidator] = None
+_worker_options: Tuple[bool, bool] = (False, False)
+
+
+def _init_worker(xsd_file: str, rules_only: bool = False, stream: bool = False):
+    """Per-process setup for batch mode: one validator, schema compiled up front"""
+    global _worker_validator, _worker_options
+    _worker_validator = ISO20022XMLValidator(xsd_file)
+    _worker_options = (rules_only, stream)
+    if HAS_LXML and not (rules_only or stream):
+        try:
+            _load_schema(xsd_file, os.path.getmtime(xsd_file))
+        except (lxml_etree.LxmlError, OSError):
+            # A broken schema must not kill the pool; validate() reports it
+            # per file as an XSD validation issue, as in single-file mode
+            pass
+
+
+def _validate_in_worker(xml_file: str) -> Tuple[str, Dict]:
+    return xml_file, _worker_validator.validate(xml_file, *_worker_options)
+
+
+def validate_batch(xml_files: List[str], xsd_file: str, workers: Optional[int] = None,
+                   rules_only: bool = False, stream: bool = False) -> Dict:
+    """Validate many XML files against one XSD across worker processes"""
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(xsd_file, rules_only, stream)) as ex:
+            reports = dict(ex.map(_validate_in_worker, xml_files, chunksize=8))
+    except BrokenProcessPool as e:
+        raise SystemExit(f"❌ Error: batch validation stopped - a worker process died ({e})")
+    
+    return {
+        'valid': all(r['valid'] for r in reports.values()),
+        'summary': {
+            'files': len(reports),
+            'valid_files': sum(1 for r in reports.values() if r['valid']),
+            'total_issues': sum(r['summary']['total_issues'] for r in reports.values()),
+            'errors': sum(r['summary']['errors'] for r in reports.values()),
+            'warnings': sum(r['summary']['warnings'] for r in reports.values()),
+        },
+        'files': reports
+    }
+
+
+def _write_json_report(report: Dict, output_file: str):
+    """Write a JSON report, encoding straight to bytes with orjson when available"""
+    if HAS_ORJSON:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
 
 
 def extract_xsd_from_zip(zip_file: str, output_dir: str) -> List[str]:
@@ -530,18 +857,43 @@ Examples:
   
   # Save report to file
   python xml_validator.py message.xml schema.xsd -o report.json
+  
+  # Validate a directory (or glob) of files on 4 worker processes
+  python xml_validator.py --batch 'messages/*.xml' schema.xsd -j 4 -o batch.json
+  
+  # Business rules only (no XSD pass) for already schema-checked feeds
+  python xml_validator.py --batch 'messages/*.xml' schema.xsd --rules-only
+  
+  # Rules only, constant memory, for multi-GB files
+  python xml_validator.py huge_batch.xml schema.xsd --stream
         """
     )
     
-    parser.add_argument('xml_file', help='XML file to validate')
+    parser.add_argument('xml_file', nargs='?', help='XML file to validate')
     parser.add_argument('xsd_file', help='XSD schema file or ZIP containing XSD files')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
     parser.add_argument('-o', '--output', help='Save report to file')
+    parser.add_argument('--batch', metavar='PATTERN',
+                        help='Validate every XML file in a directory or matching a glob')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Worker processes for --batch (default: CPU count)')
+    parser.add_argument('--rules-only', action='store_true',
+                        help='Skip XSD validation; check ISO 20022 business rules and formats only')
+    parser.add_argument('--stream', action='store_true',
+                        help='Like --rules-only, but parse with SAX in constant memory (very large files)')
     
     args = parser.parse_args()
     
     # Check files exist
-    if not Path(args.xml_file).exists():
+    if args.batch:
+        pattern = os.path.join(args.batch, '*.xml') if os.path.isdir(args.batch) else args.batch
+        batch_files = sorted(glob.glob(pattern))
+        if not batch_files:
+            print(f"❌ Error: No XML files match '{args.batch}'")
+            return
+    elif not args.xml_file:
+        parser.error('xml_file is required unless --batch is given')
+    elif not Path(args.xml_file).exists():
         print(f"❌ Error: XML file '{args.xml_file}' not found")
         return
     
@@ -564,28 +916,45 @@ Examples:
     print(f"\n{'='*70}")
     print("ISO 20022 XML VALIDATOR")
     print(f"{'='*70}\n")
-    print(f"📄 XML: {args.xml_file}")
+    print(f"📄 XML: {args.batch or args.xml_file}")
     print(f"📋 XSD: {xsd_file}")
     
-    if not HAS_LXML:
+    if not HAS_LXML and not (args.rules_only or args.stream):
         print("\n⚠️  lxml not installed - XSD validation will be skipped")
         print("   Install with: pip install lxml")
     
+    if args.batch:
+        print(f"\n⏳ Validating {len(batch_files)} files...")
+        report = validate_batch(batch_files, xsd_file, args.jobs, args.rules_only, args.stream)
+        
+        if args.output:
+            _write_json_report(report, args.output)
+            print(f"\n📁 Report saved to: {args.output}")
+        elif args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            for path, file_report in report['files'].items():
+                status = "✅" if file_report['valid'] else "❌"
+                print(f"   {status} {path}: {file_report['summary']['errors']} errors, "
+                      f"{file_report['summary']['warnings']} warnings")
+        
+        summary = report['summary']
+        print(f"\n📊 {summary['valid_files']}/{summary['files']} files valid, "
+              f"{summary['errors']} errors, {summary['warnings']} warnings")
+        return
+    
     print(f"\n⏳ Validating...")
     
     # Run validation
-    report = validate_xml(args.xml_file, xsd_file)
+    report = validate_xml(args.xml_file, xsd_file, args.rules_only, args.stream)
     
     # Output results
     if args.json or args.output:
-        json_output = json.dumps(report, indent=2)
-        
         if args.output:
-            with open(args.output, 'w') as f:
-                f.write(json_output)
+            _write_json_report(report, args.output)
             print(f"\n📁 Report saved to: {args.output}")
         else:
-            print(json_output)
+            print(json.dumps(report, indent=2))
     else:
         # Pretty print results
         print(f"\n{'='*70}")